@@ -1,3 +1,5 @@
+from datetime import datetime, timezone
+
 MAX_LENGTH_FIELD_RECIPE_MODELS = 200
 MAX_LENGTH_EMAILFIELD = 254
 MAX_LENGTH_FIELD_USER_MODELS = 150
@@ -8,3 +10,57 @@ MAX_INGREDIENT_VALUE = 32000
 
 PAGE_SIZE = 6
 MAX_PAGE_SIZE = 50
+
+DEFAULT_SHOPPING_LIST_FORMAT = 'txt'
+SHOPPING_LIST_CHUNK_SIZE = 500
+
+IMPORT_BATCH_SIZE = 1000
+
+INGREDIENT_SEARCH_LIMIT = 50
+
+REFERENCE_CACHE_TIMEOUT = 60 * 60 * 24
+LOCAL_CACHE_MAX_SIZE = 256
+
+MAX_IMAGE_SIZE = 2 * 1024 * 1024
+MAX_IMAGE_PIXELS = 25_000_000
+THUMBNAIL_WORKERS = 2
+THUMBNAIL_QUALITY = 85
+THUMBNAIL_SIZES = {
+    'card': ('480x320', {'crop': 'center'}),
+    'short': ('160x160', {'crop': 'center'}),
+    'full': ('1200', {'upscale': False}),
+}
+
+AUTH_TOKEN_CACHE_TIMEOUT = 60
+
+TRENDING_HALF_LIFE_HOURS = 72
+TRENDING_EPOCH = datetime(2023, 1, 1, tzinfo=timezone.utc)
+TRENDING_BATCH_SIZE = 1000
+
+SEARCH_CONFIG = 'russian'
+# Веса названия, ингредиентов и описания рецепта для BM25 в SQLite.
+SEARCH_FTS_WEIGHTS = (10.0, 5.0, 1.0)
+SEARCH_INDEX_BATCH_SIZE = 500
+
+# Больше максимального размера страницы: первая страница ленты
+# любого размера целиком берется из кеша.
+FEED_HEAD_SIZE = MAX_PAGE_SIZE + 1
+FEED_CACHE_TIMEOUT = 60 * 60
+
+# Рецептов в одном запросе массового добавления/удаления.
+BULK_MAX_RECIPES = 100
+
+SEED_BATCH_SIZE = 5000
+SEED_PASSWORD = 'foodgram-seed'
+# Показатель степени распределения Ципфа для синтетических данных.
+SEED_ZIPF_EXPONENT = 1.1
+SEED_DAYS = 365
+SEED_MAX_COOKING_TIME = 240
+SEED_INGREDIENTS_PER_RECIPE = (3, 10)
+SEED_PAIR_ROUNDS = 20
+SEED_IMAGE_SIZE = (800, 600)
+SEED_IMAGE_COLOR = '#E26C2D'
+
+# Число одинаковых по форме SQL-запросов, после которого запрос
+# считается проблемой N+1.
+N_PLUS_ONE_THRESHOLD = 5
@@ -0,0 +1,194 @@
+import json
+import logging
+import random
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework import serializers
+
+from foodgram_backend import constants
+
+logger = logging.getLogger('foodgram.profiling')
+
+SQL_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b|%s")
+SQL_LISTS = re.compile(r'\((?:\s*\?\s*,)+\s*\?\s*\)')
+
+# Профиль обрабатываемого запроса, если он попал в выборку.
+current_profile = ContextVar('current_profile', default=None)
+
+
+def normalize_sql(sql):
+    """Форма SQL-запроса без значений: для поиска повторов N+1."""
+    return SQL_LISTS.sub('(?)', SQL_LITERALS.sub('?', sql))
+
+
+class RequestProfile:
+    """Запросы к БД и время обработки одного HTTP-запроса."""
+
+    def __init__(self):
+        self.queries = []
+        self.db_time = 0
+        self.render_time = 0
+        self.serialize_time = 0
+        self.serializing = False
+
+    def record_query(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.queries.append((sql, repr(params)))
+
+    @contextmanager
+    def measure_serialization(self):
+        """Учет времени сериализации без вложенных сериализаторов.
+
+        Время запросов к БД во время сериализации учитывается в db.
+        """
+        if self.serializing:
+            yield
+            return
+        self.serializing = True
+        start = time.perf_counter()
+        db_time = self.db_time
+        try:
+            yield
+        finally:
+            self.serializing = False
+            self.serialize_time += (
+                time.perf_counter() - start - (self.db_time - db_time)
+            )
+
+    def get_duplicates(self):
+        """Запросы, выполненные несколько раз с одинаковыми параметрами."""
+        return {
+            sql: count
+            for (sql, _), count in Counter(self.queries).items()
+            if count > 1
+        }
+
+    def get_repeated_patterns(self):
+        """Формы запросов, повторенные не меньше N_PLUS_ONE_THRESHOLD раз."""
+        return {
+            pattern: count
+            for pattern, count in Counter(
+                normalize_sql(sql) for sql, _ in self.queries
+            ).items()
+            if count >= constants.N_PLUS_ONE_THRESHOLD
+        }
+
+
+def timed_data(data):
+    """Свойство data сериализатора с замером времени сериализации."""
+    @wraps(data.fget)
+    def get_data(serializer):
+        profile = current_profile.get()
+        if profile is None:
+            return data.fget(serializer)
+        with profile.measure_serialization():
+            return data.fget(serializer)
+
+    get_data.timed = True
+    return property(get_data)
+
+
+def install_serializer_timer():
+    """Замер времени сериализации для всех сериализаторов DRF."""
+    for serializer_class in (serializers.Serializer,
+                             serializers.ListSerializer):
+        if not getattr(serializer_class.data.fget, 'timed', False):
+            serializer_class.data = timed_data(serializer_class.data)
+
+
+class RequestProfilingMiddleware:
+    """Профилирование выборки запросов.
+
+    Для доли запросов REQUEST_PROFILING_SAMPLE_RATE считает запросы
+    к БД и их время, время сериализации и отрисовки ответа, размер
+    ответа; добавляет
+    заголовок Server-Timing и пишет строку JSON в журнал
+    foodgram.profiling. Повторяющиеся запросы (N+1) записываются
+    с уровнем WARNING. При нулевой доле middleware отключается.
+    """
+
+    def __init__(self, get_response):
+        self.sample_rate = settings.REQUEST_PROFILING_SAMPLE_RATE
+        if not self.sample_rate:
+            raise MiddlewareNotUsed
+        install_serializer_timer()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+        profile = request.profile = RequestProfile()
+        token = current_profile.set(profile)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(profile.record_query)
+                    )
+                response = self.get_response(request)
+        finally:
+            current_profile.reset(token)
+        total = time.perf_counter() - start
+        self.report(request, response, profile, total)
+        return response
+
+    def process_template_response(self, request, response):
+        profile = getattr(request, 'profile', None)
+        if profile is not None:
+            start = time.perf_counter()
+
+            def finish_render(response):
+                profile.render_time = time.perf_counter() - start
+
+            response.add_post_render_callback(finish_render)
+        return response
+
+    def report(self, request, response, profile, total):
+        app_time = (
+            total - profile.db_time - profile.serialize_time
+            - profile.render_time
+        )
+        response['Server-Timing'] = ', '.join((
+            f'db;dur={profile.db_time * 1000:.1f};'
+            f'desc="{len(profile.queries)} queries"',
+            f'app;dur={app_time * 1000:.1f}',
+            f'serialize;dur={profile.serialize_time * 1000:.1f}',
+            f'render;dur={profile.render_time * 1000:.1f}',
+            f'total;dur={total * 1000:.1f}',
+        ))
+        match = request.resolver_match
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'queries': len(profile.queries),
+            'db_ms': round(profile.db_time * 1000, 2),
+            'serialize_ms': round(profile.serialize_time * 1000, 2),
+            'render_ms': round(profile.render_time * 1000, 2),
+            'total_ms': round(total * 1000, 2),
+            'response_bytes': (
+                None if response.streaming else len(response.content)
+            ),
+        }
+        duplicates = profile.get_duplicates()
+        repeated = profile.get_repeated_patterns()
+        if duplicates or repeated:
+            record['duplicate_queries'] = duplicates
+            record['n_plus_one'] = repeated
+            logger.warning(json.dumps(record, ensure_ascii=False))
+        else:
+            logger.info(json.dumps(record, ensure_ascii=False))
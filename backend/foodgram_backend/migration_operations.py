@@ -0,0 +1,40 @@
+from django.db.migrations import AddIndex
+
+
+class AddIndexConcurrently(AddIndex):
+    """Создание индекса без блокировки записи в таблицу.
+
+    На PostgreSQL используется CREATE INDEX CONCURRENTLY, поэтому
+    миграция должна быть объявлена с atomic = False. На остальных
+    базах индекс создается обычным CREATE INDEX.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state,
+                          to_state):
+        if schema_editor.connection.vendor != 'postgresql':
+            return super().database_forwards(
+                app_label, schema_editor, from_state, to_state
+            )
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.add_index(model, self.index, concurrently=True)
+
+    def database_backwards(self, app_label, schema_editor, from_state,
+                           to_state):
+        if schema_editor.connection.vendor != 'postgresql':
+            return super().database_backwards(
+                app_label, schema_editor, from_state, to_state
+            )
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.remove_index(
+                model,
+                self.index,
+                concurrently=True
+            )
+
+    def describe(self):
+        return (
+            f'Concurrently create index {self.index.name} '
+            f'on model {self.model_name}'
+        )
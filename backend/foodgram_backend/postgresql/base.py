@@ -0,0 +1,35 @@
+from django.db.backends.postgresql import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """PostgreSQL с проверкой постоянных соединений.
+
+    Если в настройках базы задан CONN_HEALTH_CHECKS, соединение,
+    оставшееся от предыдущего запроса, проверяется при первом
+    обращении к базе в новом запросе и переоткрывается, если сервер
+    его закрыл.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.health_check_done = False
+
+    def connect(self):
+        super().connect()
+        self.health_check_done = True
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
+
+    def ensure_connection(self):
+        if (
+            self.connection is not None
+            and self.settings_dict.get('CONN_HEALTH_CHECKS')
+            and not self.health_check_done
+            and not self.in_atomic_block
+        ):
+            if not self.is_usable():
+                self.close()
+            self.health_check_done = True
+        super().ensure_connection()
@@ -34,6 +34,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'foodgram_backend.middleware.RequestProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -46,6 +47,28 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'foodgram_backend.urls'
 
+# Доля профилируемых запросов от 0 до 1, 0 - профилирование выключено.
+REQUEST_PROFILING_SAMPLE_RATE = float(
+    os.getenv('REQUEST_PROFILING_SAMPLE_RATE', 0)
+)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'foodgram.profiling': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -68,26 +91,54 @@ WSGI_APPLICATION = 'foodgram_backend.wsgi.application'
 # Database
 
 DB_SQLITE = os.getenv('DB_SQLITE')
+DB_CONN_MAX_AGE = int(os.getenv('DB_CONN_MAX_AGE', 60))
+DB_CONN_HEALTH_CHECKS = os.getenv('DB_CONN_HEALTH_CHECKS', 'True') == 'True'
+DB_POOLER = os.getenv('DB_POOLER', '')
 
 if DB_SQLITE == 'dev':
     DATABASES = {
         "default": {
             "ENGINE": "django.db.backends.sqlite3",
             "NAME": os.path.join(BASE_DIR, "db.sqlite3"),
+            "CONN_MAX_AGE": DB_CONN_MAX_AGE,
         }
     }
 else:
     DATABASES = {
         'default': {
-            'ENGINE': 'django.db.backends.postgresql',
+            'ENGINE': 'foodgram_backend.postgresql',
             'NAME': os.getenv('POSTGRES_DB', 'django'),
             'USER': os.getenv('POSTGRES_USER', 'django'),
             'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
             'HOST': os.getenv('DB_HOST', ''),
             'PORT': os.getenv('DB_PORT', '5432'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': DB_CONN_HEALTH_CHECKS,
+            # В режиме пула транзакций PgBouncer курсоры на стороне
+            # сервера не переживают завершения транзакции.
+            'DISABLE_SERVER_SIDE_CURSORS': DB_POOLER == 'pgbouncer',
         }
     }
 
+# Cache
+
+# Версии справочников, токены и ленты подписок должны сбрасываться
+# во всех процессах, поэтому кеш в памяти процесса используется
+# только в режиме разработки.
+if DB_SQLITE == 'dev':
+    CACHE_BACKEND = 'django.core.cache.backends.locmem.LocMemCache'
+    CACHE_LOCATION = ''
+else:
+    CACHE_BACKEND = 'django_redis.cache.RedisCache'
+    CACHE_LOCATION = 'redis://redis:6379/1'
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', CACHE_BACKEND),
+        'LOCATION': os.getenv('CACHE_LOCATION', CACHE_LOCATION),
+    }
+}
+
 # Password validation
 
 AUTH_USER_MODEL = 'users.User'
@@ -142,7 +193,7 @@ REST_FRAMEWORK = {
     ],
 
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'users.authentication.CachedTokenAuthentication',
     ],
 
 }
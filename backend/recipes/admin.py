@@ -3,6 +3,7 @@ from django.contrib.auth.models import Group
 from rest_framework.authtoken.models import TokenProxy
 
 from .models import Favorite, Ingredient, Recipe, ShoppingCart, Tag
+from .search import update_search_index
 
 
 class IngredientAdmin(admin.ModelAdmin):
@@ -77,7 +78,12 @@ class RecipeAdmin(admin.ModelAdmin):
     @admin.display(description='Добавили в избранное')
     def count_favorite(self, obj):
         """Показывает сколько раз рецепт добавлен в избранное."""
-        return obj.favorites.count()
+        return obj.favorites_count
+
+    def save_related(self, request, form, formsets, change):
+        """Обновление поискового индекса после сохранения ингредиентов."""
+        super().save_related(request, form, formsets, change)
+        update_search_index([form.instance.pk])
 
 
 class FavoriteAdmin(admin.ModelAdmin):
@@ -0,0 +1,83 @@
+from bisect import bisect_left
+from threading import Lock
+
+from django.db import connection
+from django.db.models import Case, IntegerField, Value, When
+
+from foodgram_backend import constants
+from .cache import get_version
+from .models import Ingredient
+
+
+class IngredientIndex:
+    """Индекс названий ингредиентов в памяти процесса.
+
+    Ингредиенты хранятся в списке, отсортированном по названию без учета
+    регистра: совпадения по началу названия находятся бинарным поиском,
+    совпадения по вхождению - просмотром списка. Индекс перестраивается
+    при смене версии справочника ингредиентов.
+    """
+
+    def __init__(self):
+        self.keys = None
+        self.ingredients = None
+        self.version = None
+        self.lock = Lock()
+
+    def load(self):
+        entries = sorted(
+            (ingredient.name.casefold(), ingredient.pk, ingredient)
+            for ingredient in Ingredient.objects.order_by()
+        )
+        self.keys = [key for key, _, _ in entries]
+        self.ingredients = [ingredient for _, _, ingredient in entries]
+
+    def invalidate(self):
+        with self.lock:
+            self.version = None
+
+    def search(self, value, limit):
+        """Сначала совпадения по началу названия, затем по вхождению."""
+        version = get_version('ingredients')
+        with self.lock:
+            if self.version is None or self.version != version:
+                self.load()
+                self.version = version
+            keys, ingredients = self.keys, self.ingredients
+        value = value.casefold()
+        index = bisect_left(keys, value)
+        found = []
+        while (
+            index < len(keys)
+            and len(found) < limit
+            and keys[index].startswith(value)
+        ):
+            found.append(ingredients[index])
+            index += 1
+        for key, ingredient in zip(keys, ingredients):
+            if len(found) >= limit:
+                break
+            if value in key and not key.startswith(value):
+                found.append(ingredient)
+        return found
+
+
+ingredient_index = IngredientIndex()
+
+
+def search_ingredients(value, limit=constants.INGREDIENT_SEARCH_LIMIT):
+    """Поиск ингредиентов по названию без учета регистра.
+
+    Совпадения по началу названия идут раньше совпадений по вхождению.
+    На PostgreSQL поиск выполняется в базе с использованием индексов,
+    на других базах - по индексу в памяти процесса.
+    """
+    if connection.vendor == 'postgresql':
+        return Ingredient.objects.filter(name__icontains=value).annotate(
+            search_rank=Case(
+                When(name__istartswith=value, then=Value(0)),
+                default=Value(1),
+                output_field=IntegerField()
+            )
+        ).order_by('search_rank', 'name')[:limit]
+    return ingredient_index.search(value, limit)
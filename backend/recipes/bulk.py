@@ -0,0 +1,137 @@
+from django.db import connection, transaction
+from django.db.models import F
+
+from .counters import actual_count
+from .models import Recipe
+from .signals import COUNTERS
+
+ADDED = 'added'
+ALREADY_ADDED = 'already_added'
+REMOVED = 'removed'
+NOT_FOUND = 'not_found'
+
+
+def get_results(recipe_ids, statuses, default=NOT_FOUND):
+    """Результаты по каждому рецепту в порядке запроса."""
+    return [
+        {'id': recipe_id, 'status': statuses.get(recipe_id, default)}
+        for recipe_id in dict.fromkeys(recipe_ids)
+    ]
+
+
+def get_columns(model):
+    """Таблица и столбцы пользователя и рецепта модели для SQL."""
+    meta = model._meta
+    quote = connection.ops.quote_name
+    return (
+        quote(meta.db_table),
+        quote(meta.get_field('user').column),
+        quote(meta.get_field('recipe').column),
+    )
+
+
+def insert_returning(model, user, recipe_ids):
+    """Вставка записей в PostgreSQL с возвратом id добавленных рецептов.
+
+    Записи, уже добавленные параллельным запросом, пропускаются
+    и не попадают в результат.
+    """
+    table, user_column, recipe_column = get_columns(model)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} ({user_column}, {recipe_column}) '
+            'SELECT %s, UNNEST(%s::bigint[]) '
+            f'ON CONFLICT DO NOTHING RETURNING {recipe_column}',
+            [user.pk, list(recipe_ids)]
+        )
+        return {recipe_id for recipe_id, in cursor.fetchall()}
+
+
+def delete_returning(model, user, recipe_ids=None):
+    """Удаление записей в PostgreSQL с возвратом id удаленных рецептов.
+
+    Без списка id удаляются все записи пользователя.
+    """
+    table, user_column, recipe_column = get_columns(model)
+    sql = f'DELETE FROM {table} WHERE {user_column} = %s'
+    params = [user.pk]
+    if recipe_ids is not None:
+        sql += f' AND {recipe_column} = ANY(%s::bigint[])'
+        params.append(list(recipe_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f'{sql} RETURNING {recipe_column}', params)
+        return {recipe_id for recipe_id, in cursor.fetchall()}
+
+
+@transaction.atomic
+def add_recipes(model, user, recipe_ids):
+    """Добавление рецептов в избранное/покупки пользователя.
+
+    Несуществующие рецепты пропускаются, уже добавленные не дублируются.
+    Массовая вставка не вызывает сигналы, поэтому счетчики избранного/
+    покупок обновляются здесь: в PostgreSQL - по действительно
+    вставленным записям, в остальных базах - пересчетом записей
+    затронутых рецептов.
+    """
+    found = set(
+        Recipe.objects.filter(pk__in=recipe_ids).order_by().values_list(
+            'pk',
+            flat=True
+        )
+    )
+    field = COUNTERS[model]
+    if connection.vendor == 'postgresql':
+        added = insert_returning(model, user, found)
+        Recipe.objects.filter(pk__in=added).update(
+            **{field: F(field) + 1}
+        )
+    else:
+        existing = set(
+            model.objects.filter(
+                user=user,
+                recipe_id__in=found
+            ).order_by().values_list('recipe_id', flat=True)
+        )
+        added = found - existing
+        model.objects.bulk_create(
+            [model(user=user, recipe_id=recipe_id)
+             for recipe_id in sorted(added)],
+            ignore_conflicts=True
+        )
+        Recipe.objects.filter(pk__in=added).update(
+            **{field: actual_count(model, 'recipe')}
+        )
+    statuses = dict.fromkeys(found, ALREADY_ADDED)
+    statuses.update(dict.fromkeys(added, ADDED))
+    return get_results(recipe_ids, statuses)
+
+
+@transaction.atomic
+def remove_recipes(model, user, recipe_ids=None):
+    """Удаление рецептов из избранного/покупок пользователя.
+
+    Без списка id удаляются все рецепты пользователя. Записи удаляются
+    одним DELETE без сигналов, поэтому счетчики обновляются здесь,
+    как и при добавлении.
+    """
+    field = COUNTERS[model]
+    if connection.vendor == 'postgresql':
+        removed = delete_returning(model, user, recipe_ids)
+        Recipe.objects.filter(pk__in=removed).update(
+            **{field: F(field) - 1}
+        )
+    else:
+        queryset = model.objects.filter(user=user).order_by()
+        if recipe_ids is not None:
+            queryset = queryset.filter(recipe_id__in=recipe_ids)
+        removed = set(queryset.values_list('recipe_id', flat=True))
+        if removed:
+            # delete() вызвал бы сигналы и UPDATE счетчика для каждой записи.
+            queryset._raw_delete(queryset.db)
+        Recipe.objects.filter(pk__in=removed).update(
+            **{field: actual_count(model, 'recipe')}
+        )
+    return get_results(
+        sorted(removed) if recipe_ids is None else recipe_ids,
+        dict.fromkeys(removed, REMOVED)
+    )
@@ -0,0 +1,77 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from django.core.cache import cache
+
+from foodgram_backend import constants
+
+
+class LRUCache:
+    """Кеш в памяти процесса с вытеснением давно не использованных ключей."""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.data = OrderedDict()
+        self.lock = Lock()
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.data:
+                return None
+            self.data.move_to_end(key)
+            return self.data[key]
+
+    def set(self, key, value):
+        with self.lock:
+            self.data[key] = value
+            self.data.move_to_end(key)
+            while len(self.data) > self.max_size:
+                self.data.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+
+
+local_cache = LRUCache(constants.LOCAL_CACHE_MAX_SIZE)
+
+
+def version_key(namespace):
+    return f'reference:{namespace}:version'
+
+
+def get_version(namespace):
+    """Текущая версия данных справочника.
+
+    Версия хранится в общем кеше и входит в ключи всех закешированных
+    ответов справочника, поэтому ее смена делает их недоступными
+    во всех процессах.
+    """
+    version = cache.get(version_key(namespace))
+    if version is None:
+        cache.add(version_key(namespace), time.time_ns(), timeout=None)
+        version = cache.get(version_key(namespace), time.time_ns())
+    return version
+
+
+def bump_version(namespace):
+    """Смена версии данных справочника после их изменения."""
+    cache.set(version_key(namespace), time.time_ns(), timeout=None)
+
+
+def get_or_set(key, default):
+    """Получение данных справочника из кеша или их вычисление.
+
+    Сначала проверяется кеш процесса, затем общий кеш. В ключ должна
+    входить версия справочника.
+    """
+    key = f'reference:{key}'
+    value = local_cache.get(key)
+    if value is None:
+        value = cache.get(key)
+        if value is None:
+            value = default()
+            cache.set(key, value, constants.REFERENCE_CACHE_TIMEOUT)
+        local_cache.set(key, value)
+    return value
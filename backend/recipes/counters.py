@@ -0,0 +1,43 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from users.models import Subscription, User
+from .models import Favorite, Recipe, ShoppingCart
+
+# Модель и поле счетчика, модель и поле связи подсчитываемых записей.
+COUNTERS = (
+    (Recipe, 'favorites_count', Favorite, 'recipe'),
+    (Recipe, 'in_carts_count', ShoppingCart, 'recipe'),
+    (User, 'recipes_count', Recipe, 'author'),
+    (User, 'followers_count', Subscription, 'following'),
+)
+
+
+def actual_count(related_model, related_field):
+    """Подзапрос количества связанных записей для значения счетчика."""
+    return Coalesce(
+        Subquery(
+            related_model.objects.filter(
+                **{related_field: OuterRef('pk')}
+            ).order_by().values(related_field).annotate(
+                count=Count('pk')
+            ).values('count')
+        ),
+        0
+    )
+
+
+def reconcile(model, field, related_model, related_field, dry_run=False):
+    """Исправление счетчика, разошедшегося с количеством записей.
+
+    Возвращает id исправленных записей.
+    """
+    count = actual_count(related_model, related_field)
+    drifted = list(
+        model.objects.order_by().annotate(actual=count).exclude(
+            **{field: F('actual')}
+        ).values_list('pk', flat=True)
+    )
+    if drifted and not dry_run:
+        model.objects.filter(pk__in=drifted).update(**{field: count})
+    return drifted
@@ -0,0 +1,117 @@
+import csv
+import json
+
+from django.http import StreamingHttpResponse
+
+
+class Echo:
+    """Объект-заглушка файла: возвращает записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+class ShoppingListExporter:
+    """Базовый класс выгрузки списка покупок.
+
+    Строки списка формируются генератором по мере чтения из базы,
+    поэтому файл не собирается в памяти целиком.
+    """
+
+    content_type = None
+    extension = None
+
+    def header(self):
+        return ''
+
+    def row(self, item, index):
+        raise NotImplementedError
+
+    def footer(self):
+        return ''
+
+    def stream(self, items):
+        """Генератор содержимого файла."""
+        yield self.header()
+        for index, item in enumerate(items):
+            yield self.row(item, index)
+        yield self.footer()
+
+    def get_response(self, items):
+        """Потоковый ответ с файлом списка покупок."""
+        response = StreamingHttpResponse(
+            self.stream(items),
+            content_type=self.content_type
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename=shopping_list.{self.extension}'
+        )
+        return response
+
+
+class TextExporter(ShoppingListExporter):
+    """Выгрузка списка покупок в текстовый файл."""
+
+    content_type = 'text/plain; charset=utf-8'
+    extension = 'txt'
+
+    def header(self):
+        return 'Список покупок:\n\n'
+
+    def row(self, item, index):
+        return (
+            f'{item["ingredient__name"]} - '
+            f'{item["amount"]} '
+            f'{item["ingredient__measurement_unit"]}\n'
+        )
+
+
+class CSVExporter(ShoppingListExporter):
+    """Выгрузка списка покупок в CSV."""
+
+    content_type = 'text/csv; charset=utf-8'
+    extension = 'csv'
+
+    def __init__(self):
+        self.writer = csv.writer(Echo())
+
+    def header(self):
+        return self.writer.writerow(
+            ('Ингредиент', 'Количество', 'Единица измерения')
+        )
+
+    def row(self, item, index):
+        return self.writer.writerow((
+            item['ingredient__name'],
+            item['amount'],
+            item['ingredient__measurement_unit'],
+        ))
+
+
+class JSONExporter(ShoppingListExporter):
+    """Выгрузка списка покупок в JSON."""
+
+    content_type = 'application/json'
+    extension = 'json'
+
+    def header(self):
+        return '['
+
+    def row(self, item, index):
+        return ('' if index == 0 else ',') + json.dumps(
+            {
+                'name': item['ingredient__name'],
+                'measurement_unit': item['ingredient__measurement_unit'],
+                'amount': item['amount'],
+            },
+            ensure_ascii=False
+        )
+
+    def footer(self):
+        return ']'
+
+
+EXPORTERS = {
+    exporter.extension: exporter
+    for exporter in (TextExporter, CSVExporter, JSONExporter)
+}
@@ -0,0 +1,44 @@
+from django.core.cache import cache
+
+from foodgram_backend import constants
+from users.models import Subscription
+from .models import Recipe
+
+
+def feed_cache_key(user_id):
+    return f'feed:{user_id}:head'
+
+
+def get_feed_head(user):
+    """id последних рецептов ленты пользователя из кеша.
+
+    Начало ленты хранится в кеше, пока авторы, на которых подписан
+    пользователь, не опубликуют или не удалят рецепт, либо пока
+    пользователь не изменит подписки.
+    """
+    key = feed_cache_key(user.pk)
+    head = cache.get(key)
+    if head is None:
+        head = list(
+            Recipe.objects.followed_by(user).order_by(
+                '-pub_date',
+                '-id'
+            ).values_list('id', flat=True)[:constants.FEED_HEAD_SIZE]
+        )
+        cache.set(key, head, constants.FEED_CACHE_TIMEOUT)
+    return head
+
+
+def invalidate_feeds(user_ids):
+    """Сброс кеша лент пользователей."""
+    cache.delete_many([feed_cache_key(user_id) for user_id in user_ids])
+
+
+def invalidate_follower_feeds(author_id):
+    """Сброс кеша лент подписчиков автора."""
+    invalidate_feeds(
+        Subscription.objects.filter(following_id=author_id).values_list(
+            'user_id',
+            flat=True
+        )
+    )
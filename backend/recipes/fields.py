@@ -0,0 +1,114 @@
+from drf_extra_fields.fields import Base64ImageField
+from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
+
+from foodgram_backend import constants
+from .images import get_image_url
+
+
+class BulkManyRelatedField(serializers.ManyRelatedField):
+    """Поле списка связанных объектов, загружаемых одним запросом."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        return self.child_relation.get_objects(data)
+
+
+class BulkPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Поле связанного объекта по id.
+
+    При many=True все объекты загружаются одним запросом IN,
+    а об отсутствующих id сообщается одной ошибкой.
+    """
+
+    default_error_messages = {
+        'does_not_exist_many': 'Объекты с id {pk_values} не существуют.',
+    }
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return BulkManyRelatedField(**list_kwargs)
+
+    def get_objects(self, data):
+        """Получение объектов по списку id с сохранением порядка."""
+        pks = []
+        for value in data:
+            if isinstance(value, bool):
+                self.fail('incorrect_type', data_type=type(value).__name__)
+            try:
+                pks.append(int(value))
+            except (TypeError, ValueError):
+                self.fail('incorrect_type', data_type=type(value).__name__)
+        objects = self.get_queryset().in_bulk(set(pks))
+        missing = [pk for pk in dict.fromkeys(pks) if pk not in objects]
+        if missing:
+            self.fail(
+                'does_not_exist_many',
+                pk_values=', '.join(map(str, missing))
+            )
+        return [objects[pk] for pk in pks]
+
+
+class RecipeImageField(Base64ImageField):
+    """Поле изображения рецепта в base64.
+
+    Размер файла проверяется до декодирования, размеры изображения -
+    по заголовку файла, без распаковки изображения.
+    """
+
+    default_error_messages = {
+        'file_too_large': (
+            'Размер изображения не должен превышать {max_size} байт.'
+        ),
+        'image_too_large': (
+            'Изображение не должно содержать больше {max_pixels} пикселей.'
+        ),
+    }
+
+    def to_internal_value(self, base64_data):
+        if (
+            isinstance(base64_data, str)
+            and len(base64_data.rpartition(';base64,')[2]) * 3 // 4
+            > constants.MAX_IMAGE_SIZE
+        ):
+            self.fail('file_too_large', max_size=constants.MAX_IMAGE_SIZE)
+        image_file = super().to_internal_value(base64_data)
+        image = getattr(image_file, 'image', None)
+        if (
+            image is not None
+            and image.width * image.height > constants.MAX_IMAGE_PIXELS
+        ):
+            self.fail(
+                'image_too_large',
+                max_pixels=constants.MAX_IMAGE_PIXELS
+            )
+        return image_file
+
+
+class ThumbnailField(serializers.Field):
+    """Адрес миниатюры изображения рецепта заданного размера.
+
+    Без размера выводятся адреса миниатюр всех размеров.
+    """
+
+    def __init__(self, size=None, **kwargs):
+        self.size = size
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, recipe):
+        request = self.context.get('request')
+        if self.size is not None:
+            return get_image_url(recipe, self.size, request)
+        return {
+            size: get_image_url(recipe, size, request)
+            for size in constants.THUMBNAIL_SIZES
+        }
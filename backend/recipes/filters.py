@@ -1,17 +1,57 @@
 from django.contrib.auth import get_user_model
+from django.db.models import Exists, OuterRef
 from django_filters import rest_framework as filters
 
-from .models import Ingredient, Recipe
+from .cache import get_or_set, get_version
+from .models import Recipe, Tag, TagRecipe
+from .search import search_recipes
 
 User = get_user_model()
 
 
+# Порядок рецептов для значений параметра ordering.
+RECIPE_ORDERINGS = {
+    'newest': ('-pub_date', '-id'),
+    'popular': ('-favorites_count', '-pub_date', '-id'),
+    'quickest': ('cooking_time', '-pub_date', '-id'),
+    'trending': ('-trending_score', '-pub_date', '-id'),
+}
+
+
+SEARCH_ORDERING = ('-search_rank', '-id')
+
+
+def get_recipe_ordering(request):
+    """Порядок рецептов по параметру ordering запроса.
+
+    При поиске без явного порядка рецепты сортируются по релевантности.
+    """
+    ordering = request.query_params.get('ordering')
+    if ordering in RECIPE_ORDERINGS:
+        return RECIPE_ORDERINGS[ordering]
+    if request.query_params.get('search'):
+        return SEARCH_ORDERING
+    return RECIPE_ORDERINGS['newest']
+
+
+def get_tag_ids():
+    """Словарь id тегов по слагу из кеша справочника тегов."""
+    return get_or_set(
+        f'tags:{get_version("tags")}:ids',
+        lambda: dict(Tag.objects.values_list('slug', 'id'))
+    )
+
+
+def get_tag_choices():
+    return [(slug, slug) for slug in get_tag_ids()]
+
+
 class RecipeFilter(filters.FilterSet):
     """Кастомный фильтр для рецептов."""
 
-    tags = filters.AllValuesMultipleFilter(
-        field_name='tags__slug',
-        lookup_expr='contains'
+    tags = filters.MultipleChoiceFilter(
+        choices=get_tag_choices,
+        method='filter_tags'
     )
 
     is_favorited = filters.BooleanFilter(
@@ -20,11 +60,30 @@ class RecipeFilter(filters.FilterSet):
     is_in_shopping_cart = filters.BooleanFilter(
         method='filter_is_in_shopping_cart'
     )
+    search = filters.CharFilter(method='filter_search')
+    ordering = filters.ChoiceFilter(
+        choices=[(value, value) for value in RECIPE_ORDERINGS],
+        method='filter_ordering'
+    )
 
     class Meta:
         model = Recipe
         fields = ['tags', 'author']
 
+    def filter_tags(self, queryset, name, value):
+        """Фильтрация по слагам тегов: рецепт с любым из тегов."""
+        tag_ids = get_tag_ids()
+        return queryset.filter(
+            Exists(
+                TagRecipe.objects.filter(
+                    recipe=OuterRef('pk'),
+                    tag_id__in=[
+                        tag_ids[slug] for slug in value if slug in tag_ids
+                    ]
+                )
+            )
+        )
+
     def filter_is_favorited(self, queryset, name, value):
         """Фильтрация по отметке "в избранном"."""
         user = self.request.user
@@ -39,12 +98,11 @@ class RecipeFilter(filters.FilterSet):
             return queryset.filter(shopping_cart__user_id=user.pk)
         return queryset
 
+    def filter_search(self, queryset, name, value):
+        """Полнотекстовый поиск с сортировкой по релевантности."""
+        return search_recipes(queryset, value).order_by(*SEARCH_ORDERING)
 
-class IngredientFilter(filters.FilterSet):
-    """Кастомный фильтр для Ингридиентов."""
-
-    name = filters.CharFilter(lookup_expr='startswith')
-
-    class Meta:
-        model = Ingredient
-        fields = ['name']
+    def filter_ordering(self, queryset, name, value):
+        """Сортировка: новые, популярные, быстрые в приготовлении
+        или популярные с учетом давности добавления в избранное."""
+        return queryset.order_by(*RECIPE_ORDERINGS[value])
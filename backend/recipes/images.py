@@ -0,0 +1,93 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.files.storage import default_storage
+from django.db import connection
+from sorl.thumbnail import get_thumbnail
+
+from foodgram_backend import constants
+from .models import Recipe
+
+logger = logging.getLogger(__name__)
+
+executor = ThreadPoolExecutor(
+    max_workers=constants.THUMBNAIL_WORKERS,
+    thread_name_prefix='thumbnails'
+)
+
+
+def thumbnails_ready(recipe):
+    """Созданы ли миниатюры для текущего изображения рецепта."""
+    return bool(recipe.image) and (
+        recipe.thumbnails.get('source') == recipe.image.name
+    )
+
+
+def create_thumbnails(name):
+    """Миниатюры всех размеров для изображения из хранилища.
+
+    Возвращает имена файлов миниатюр по размерам и имя исходного
+    изображения в ключе source.
+    """
+    thumbnails = {'source': name}
+    for size, (geometry, options) in constants.THUMBNAIL_SIZES.items():
+        thumbnail = get_thumbnail(
+            name,
+            geometry,
+            quality=constants.THUMBNAIL_QUALITY,
+            **options
+        )
+        if not thumbnail.exists():
+            raise FileNotFoundError(
+                f'Не удалось создать миниатюру {size} для {name}'
+            )
+        thumbnails[size] = thumbnail.name
+    return thumbnails
+
+
+def generate_thumbnails(recipe_id):
+    """Создание миниатюр изображения рецепта всех размеров."""
+    recipe = Recipe.objects.filter(pk=recipe_id).only(
+        'image',
+        'thumbnails'
+    ).first()
+    if recipe is None or not recipe.image or thumbnails_ready(recipe):
+        return
+    thumbnails = create_thumbnails(recipe.image.name)
+    Recipe.objects.filter(
+        pk=recipe_id,
+        image=recipe.image.name
+    ).update(thumbnails=thumbnails)
+
+
+def run_generate_thumbnails(recipe_id):
+    try:
+        generate_thumbnails(recipe_id)
+    except Exception:
+        logger.exception(
+            'Не удалось создать миниатюры рецепта %s', recipe_id
+        )
+    finally:
+        connection.close()
+
+
+def schedule_thumbnails(recipe):
+    """Создание миниатюр в фоновом потоке."""
+    if recipe.image and not thumbnails_ready(recipe):
+        executor.submit(run_generate_thumbnails, recipe.pk)
+
+
+def get_image_url(recipe, size, request=None):
+    """Адрес миниатюры рецепта заданного размера.
+
+    Пока миниатюры не созданы, возвращается адрес исходного изображения.
+    """
+    if not recipe.image:
+        return None
+    if thumbnails_ready(recipe) and size in recipe.thumbnails:
+        url = default_storage.url(recipe.thumbnails[size])
+    else:
+        url = recipe.image.url
+    if request is not None:
+        return request.build_absolute_uri(url)
+    return url
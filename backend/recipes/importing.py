@@ -0,0 +1,53 @@
+import csv
+import json
+from itertools import islice
+
+from .models import Ingredient
+
+
+def read_csv(path):
+    """Построчное чтение ингредиентов из файла CSV."""
+    with open(path, encoding='utf-8') as csvfile:
+        for row in csv.DictReader(csvfile):
+            yield row['название'], row['единица измерения']
+
+
+def read_json(path):
+    """Чтение ингредиентов из файла JSON."""
+    with open(path, encoding='utf-8') as jsonfile:
+        for item in json.load(jsonfile):
+            yield item['name'], item['measurement_unit']
+
+
+READERS = {
+    '.csv': read_csv,
+    '.json': read_json,
+}
+
+
+def batches(rows, batch_size):
+    """Разбиение потока строк на пакеты."""
+    rows = iter(rows)
+    while batch := list(islice(rows, batch_size)):
+        yield batch
+
+
+def import_data(rows, batch_size):
+    """Загрузка ингредиентов пакетами.
+
+    Уже существующие ингредиенты пропускаются, поэтому команду
+    можно запускать повторно. Возвращает количество прочитанных
+    и добавленных записей.
+    """
+    total = Ingredient.objects.count()
+    processed = 0
+    for batch in batches(rows, batch_size):
+        Ingredient.objects.bulk_create(
+            (
+                Ingredient(name=name, measurement_unit=measurement_unit)
+                for name, measurement_unit in batch
+            ),
+            ignore_conflicts=True
+        )
+        processed += len(batch)
+    return processed, Ingredient.objects.count() - total
@@ -0,0 +1,307 @@
+import base64
+import io
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext, override_settings
+from PIL import Image
+from rest_framework.test import APIClient
+
+from recipes.cache import local_cache
+from recipes.models import Ingredient, Recipe, Tag
+from recipes.seeding import seed_dataset
+from users.models import User
+
+BASELINE_PATH = os.path.join(settings.CSV_DIR, 'benchmark_baseline.json')
+# Метрики, сравниваемые с сохраненными значениями по отношению.
+TIMING_METRICS = ('p50_ms', 'peak_memory_kb')
+
+
+def get_image():
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 64), 'orange').save(buffer, 'PNG')
+    return (
+        'data:image/png;base64,'
+        + base64.b64encode(buffer.getvalue()).decode()
+    )
+
+
+def get_scenarios(rnd, user, recipe_ids):
+    """Сценарии: название и функция запроса по номеру повтора."""
+    own_recipe = Recipe.objects.filter(author=user).first() or Recipe(
+        pk=recipe_ids[0]
+    )
+    others = list(
+        Recipe.objects.exclude(author=user).exclude(
+            favorites__user=user
+        ).exclude(
+            shopping_cart__user=user
+        ).values_list('pk', flat=True)[:1000]
+    )
+    rnd.shuffle(others)
+    ingredients = list(Ingredient.objects.values_list('pk', 'name')[:500])
+    tag_ids = list(Tag.objects.values_list('pk', flat=True))
+    image = get_image()
+
+    def recipe_data(number):
+        return {
+            'tags': tag_ids[:1 + number % len(tag_ids)],
+            'ingredients': [
+                {'id': pk, 'amount': rnd.randint(1, 100)}
+                for pk, _ in rnd.sample(ingredients, 5)
+            ],
+            'name': f'Рецепт {number}',
+            'image': image,
+            'text': 'Описание рецепта',
+            'cooking_time': rnd.randint(1, 120),
+        }
+
+    def search(number):
+        name = ingredients[number % len(ingredients)][1]
+        return {'name': name[:1 + number % 3]}
+
+    return (
+        ('recipes_list', lambda client, number: client.get(
+            '/api/recipes/', {'page': 1 + number % 3}
+        )),
+        ('recipes_retrieve', lambda client, number: client.get(
+            f'/api/recipes/{recipe_ids[number % len(recipe_ids)]}/'
+        )),
+        ('recipes_create', lambda client, number: client.post(
+            '/api/recipes/', recipe_data(number), format='json'
+        )),
+        ('recipes_update', lambda client, number: client.patch(
+            f'/api/recipes/{own_recipe.pk}/', recipe_data(number),
+            format='json'
+        )),
+        ('favorite_add', lambda client, number: client.post(
+            f'/api/recipes/{others[number]}/favorite/'
+        )),
+        ('favorite_remove', lambda client, number: client.delete(
+            f'/api/recipes/{others[number]}/favorite/'
+        )),
+        ('shopping_cart_add', lambda client, number: client.post(
+            f'/api/recipes/{others[number]}/shopping_cart/'
+        )),
+        ('shopping_cart_remove', lambda client, number: client.delete(
+            f'/api/recipes/{others[number]}/shopping_cart/'
+        )),
+        ('download_shopping_cart', lambda client, number: client.get(
+            '/api/recipes/download_shopping_cart/'
+        )),
+        ('ingredients_search', lambda client, number: client.get(
+            '/api/ingredients/', search(number)
+        )),
+        ('subscriptions', lambda client, number: client.get(
+            '/api/users/subscriptions/', {'recipes_limit': 3}
+        )),
+        ('users_list', lambda client, number: client.get(
+            '/api/users/', {'page': 1 + number % 3}
+        )),
+    )
+
+
+def request(scenario, client, number):
+    response = scenario(client, number)
+    b''.join(getattr(response, 'streaming_content', ()))
+    if response.status_code >= 400:
+        raise CommandError(
+            f'{response.request["PATH_INFO"]}: '
+            f'код ответа {response.status_code}'
+        )
+
+
+def measure(scenario, client, repeat):
+    """Число запросов к БД, p50/p95 времени ответа и пик памяти.
+
+    Память измеряется отдельным первым запросом: tracemalloc
+    замедляет выполнение и исказил бы время ответа.
+    """
+    tracemalloc.start()
+    request(scenario, client, 0)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    timings = []
+    queries = 0
+    for number in range(1, repeat + 1):
+        with CaptureQueriesContext(connection) as context:
+            start = time.perf_counter()
+            request(scenario, client, number)
+            timings.append((time.perf_counter() - start) * 1000)
+        queries = max(queries, len(context.captured_queries))
+    quantiles = statistics.quantiles(timings, n=20)
+    return {
+        'queries': queries,
+        'p50_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(quantiles[-1], 3),
+        'peak_memory_kb': round(peak / 1024, 1),
+    }
+
+
+def find_query_regressions(results, baseline):
+    """Запросы к API, число SQL-запросов которых выросло.
+
+    Число запросов не зависит от машины и шума, поэтому его рост
+    считается ошибкой.
+    """
+    return [
+        f'{name}: запросов {result["queries"]}, '
+        f'было {baseline[name]["queries"]}'
+        for name, result in results.items()
+        if name in baseline
+        and result['queries'] > baseline[name]['queries']
+    ]
+
+
+def find_slowdowns(results, baseline, tolerance):
+    """Замедление и рост памяти относительно сохраненных результатов.
+
+    Время и память зависят от машины, поэтому сравниваются отношения
+    к сохраненным значениям: в результат попадают превышающие
+    tolerance.
+    """
+    slowdowns = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        for metric in TIMING_METRICS:
+            ratio = result[metric] / max(baseline[name][metric], 0.001)
+            if ratio > tolerance:
+                slowdowns.append(
+                    f'{name}: {metric} {result[metric]}, '
+                    f'было {baseline[name][metric]} (x{ratio:.2f})'
+                )
+    return slowdowns
+
+
+class Command(BaseCommand):
+    help = (
+        'Замер числа запросов к БД, времени ответа и памяти для '
+        'основных запросов API на синтетических данных'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--recipes', type=int, default=2000)
+        parser.add_argument(
+            '--favorites',
+            type=int,
+            default=20,
+            help='Рецептов в избранном в среднем на пользователя.'
+        )
+        parser.add_argument(
+            '--carts',
+            type=int,
+            default=5,
+            help='Рецептов в списке покупок в среднем на пользователя.'
+        )
+        parser.add_argument(
+            '--subscriptions',
+            type=int,
+            default=10,
+            help='Подписок в среднем на пользователя.'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=100,
+            help='Количество замеров каждого запроса.'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--baseline',
+            default=BASELINE_PATH,
+            help='Файл JSON с сохраненными результатами.'
+        )
+        parser.add_argument(
+            '--update-baseline',
+            action='store_true',
+            help='Сохранить результаты как новые эталонные.'
+        )
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=2.0,
+            help='Допустимое ухудшение медианы времени и памяти, раз.'
+        )
+        parser.add_argument(
+            '--check-timing',
+            action='store_true',
+            help=(
+                'Считать ошибкой ухудшение времени и памяти. Без флага '
+                'оно только выводится: результаты с другой машины '
+                'несопоставимы.'
+            )
+        )
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 2:
+            raise CommandError('Нужно не меньше 2 замеров')
+        rnd = random.Random(options['seed'])
+        local_cache.clear()
+        results = {}
+        with tempfile.TemporaryDirectory() as media_root, override_settings(
+            MEDIA_ROOT=media_root
+        ), transaction.atomic():
+            users = options['users']
+            user_ids, recipe_ids, _ = seed_dataset(
+                rnd,
+                users,
+                options['recipes'],
+                users * options['favorites'],
+                users * options['carts'],
+                users * options['subscriptions'],
+                prefix='benchmark'
+            )
+            user = User.objects.filter(pk__in=user_ids).annotate(
+                subscriptions=Count('follower')
+            ).order_by('-subscriptions', 'pk').first()
+            client = APIClient(HTTP_HOST=next(
+                (host.lstrip('.') for host in settings.ALLOWED_HOSTS
+                 if host != '*'),
+                'localhost'
+            ))
+            client.force_authenticate(user)
+            for name, scenario in get_scenarios(rnd, user, recipe_ids):
+                results[name] = measure(scenario, client, options['repeat'])
+                self.stdout.write(
+                    f'{name}: запросов {results[name]["queries"]}, '
+                    f'p50 {results[name]["p50_ms"]} мс, '
+                    f'p95 {results[name]["p95_ms"]} мс, '
+                    f'память {results[name]["peak_memory_kb"]} КБ'
+                )
+            transaction.set_rollback(True)
+        if options['update_baseline']:
+            with open(options['baseline'], 'w', encoding='utf-8') as file:
+                json.dump(results, file, ensure_ascii=False, indent=2)
+            self.stdout.write(self.style.SUCCESS(
+                f'Результаты сохранены в {options["baseline"]}'
+            ))
+            return
+        if not os.path.exists(options['baseline']):
+            self.stdout.write(self.style.WARNING(
+                'Нет сохраненных результатов, запустите с --update-baseline'
+            ))
+            return
+        with open(options['baseline'], encoding='utf-8') as file:
+            baseline = json.load(file)
+        regressions = find_query_regressions(results, baseline)
+        slowdowns = find_slowdowns(results, baseline, options['tolerance'])
+        for slowdown in slowdowns:
+            self.stdout.write(self.style.WARNING(slowdown))
+        if options['check_timing']:
+            regressions += slowdowns
+        if regressions:
+            raise CommandError(
+                'Ухудшения производительности:\n' + '\n'.join(regressions)
+            )
+        self.stdout.write(self.style.SUCCESS('Ухудшений не найдено'))
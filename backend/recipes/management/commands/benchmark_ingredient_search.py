@@ -0,0 +1,83 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.autocomplete import ingredient_index, search_ingredients
+from recipes.models import Ingredient
+
+
+def measure(search, queries, repeat):
+    """Время выполнения поиска в миллисекундах для каждого запроса."""
+    timings = []
+    for _ in range(repeat):
+        for query in queries:
+            start = time.perf_counter()
+            list(search(query))
+            timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+class Command(BaseCommand):
+    help = 'Замер времени поиска ингредиентов по названию'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--queries',
+            type=int,
+            default=200,
+            help='Количество поисковых запросов.'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=3,
+            help='Количество повторов каждого запроса.'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Начальное значение генератора случайных чисел.'
+        )
+
+    def handle(self, *args, **options):
+        names = list(Ingredient.objects.values_list('name', flat=True))
+        if not names:
+            raise CommandError(
+                'Нет ингредиентов, выполните import_ingredients'
+            )
+        rnd = random.Random(options['seed'])
+        queries = []
+        for _ in range(options['queries']):
+            name = rnd.choice(names)
+            start = rnd.randrange(len(name))
+            queries.append(
+                name[start:start + rnd.randint(1, 4)].upper()
+                if rnd.random() < 0.5 else name[:rnd.randint(1, 4)]
+            )
+        ingredient_index.invalidate()
+        search_ingredients(queries[0])
+        self.stdout.write(
+            f'Ингредиентов: {len(names)}, запросов: {len(queries)}'
+        )
+        for title, search in (
+            (
+                'startswith (прежний фильтр)',
+                lambda query: Ingredient.objects.filter(
+                    name__startswith=query
+                )
+            ),
+            (
+                'автодополнение',
+                search_ingredients
+            ),
+        ):
+            timings = measure(search, queries, options['repeat'])
+            quantiles = statistics.quantiles(timings, n=100)
+            self.stdout.write(
+                f'{title}: p50 {quantiles[49]:.2f} мс, '
+                f'p95 {quantiles[94]:.2f} мс, '
+                f'max {max(timings):.2f} мс'
+            )
@@ -0,0 +1,130 @@
+import re
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from recipes.cache import local_cache
+from recipes.models import Recipe, Tag
+from users.models import User
+
+SEQUENTIAL_SCAN = {
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+    'sqlite': re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$', re.M),
+}
+DERIVED_TABLE = re.compile(r'(?:CO-ROUTINE|MATERIALIZE) (\w+)')
+EXPLAIN = {
+    'postgresql': 'EXPLAIN ',
+    'sqlite': 'EXPLAIN QUERY PLAN ',
+}
+
+
+def sequential_scans(vendor, plan):
+    """Таблицы, читаемые последовательно, без учета подзапросов."""
+    return sorted(
+        set(SEQUENTIAL_SCAN[vendor].findall(plan))
+        - set(DERIVED_TABLE.findall(plan))
+    )
+
+
+def get_endpoints(user, recipe, tag):
+    """Запросы к API, планы SQL-запросов которых проверяются."""
+    return (
+        '/api/recipes/',
+        '/api/recipes/?limit=50',
+        '/api/recipes/?cursor=',
+        '/api/recipes/?ordering=popular',
+        '/api/recipes/?ordering=quickest',
+        '/api/recipes/?ordering=trending&cursor=',
+        '/api/recipes/?search=суп',
+        f'/api/recipes/?author={recipe.author_id}',
+        f'/api/recipes/?tags={tag.slug}' if tag else '/api/recipes/',
+        '/api/recipes/?is_favorited=1',
+        '/api/recipes/?is_in_shopping_cart=1',
+        f'/api/recipes/{recipe.pk}/',
+        '/api/recipes/feed/',
+        '/api/recipes/download_shopping_cart/',
+        '/api/tags/',
+        '/api/ingredients/',
+        '/api/ingredients/?name=а',
+        '/api/users/',
+        f'/api/users/{user.pk}/',
+        '/api/users/subscriptions/',
+        '/api/users/subscriptions/?recipes_limit=3',
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет EXPLAIN для SQL-запросов API и отмечает '
+        'последовательное чтение таблиц'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=int,
+            help='id пользователя, от имени которого выполняются запросы.'
+        )
+        parser.add_argument(
+            '--verbose-plans',
+            action='store_true',
+            help='Выводить полный план каждого запроса.'
+        )
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        if vendor not in EXPLAIN:
+            raise CommandError(f'База {vendor} не поддерживается')
+        recipe = Recipe.objects.first()
+        if recipe is None:
+            raise CommandError('Нет рецептов, наполните базу данными')
+        user = (
+            User.objects.get(pk=options['user']) if options['user']
+            else User.objects.filter(follower__isnull=False).first()
+            or recipe.author
+        )
+        client = APIClient(HTTP_HOST=next(
+            (host.lstrip('.') for host in settings.ALLOWED_HOSTS
+             if host != '*'),
+            'localhost'
+        ))
+        client.force_authenticate(user)
+        local_cache.clear()
+        queries = {}
+        with transaction.atomic():
+            for url in get_endpoints(user, recipe, Tag.objects.first()):
+                with CaptureQueriesContext(connection) as context:
+                    response = client.get(url)
+                    b''.join(getattr(response, 'streaming_content', ()))
+                if response.status_code != 200:
+                    self.stderr.write(
+                        f'{url}: код ответа {response.status_code}'
+                    )
+                for query in context.captured_queries:
+                    queries.setdefault(query['sql'], url)
+            transaction.set_rollback(True)
+        flagged = 0
+        with connection.cursor() as cursor:
+            for sql, url in queries.items():
+                if not sql.lstrip().upper().startswith('SELECT'):
+                    continue
+                cursor.execute(EXPLAIN[vendor] + sql)
+                plan = '\n'.join(
+                    str(row[-1]) for row in cursor.fetchall()
+                )
+                tables = sequential_scans(vendor, plan)
+                if tables:
+                    flagged += 1
+                    self.stdout.write(self.style.WARNING(
+                        f'{url}: последовательное чтение {", ".join(tables)}'
+                    ))
+                    self.stdout.write(f'  {sql}')
+                if options['verbose_plans'] or tables:
+                    self.stdout.write(f'  {plan}'.replace('\n', '\n  '))
+        self.stdout.write(self.style.SUCCESS(
+            f'Проверено запросов: {len(queries)}, '
+            f'с последовательным чтением: {flagged}'
+        ))
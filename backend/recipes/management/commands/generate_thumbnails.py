@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from recipes.images import generate_thumbnails, thumbnails_ready
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Создает миниатюры изображений рецептов, для которых их нет'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Пересоздать миниатюры всех рецептов.'
+        )
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.exclude(image='').only('image', 'thumbnails')
+        if options['force']:
+            recipes.update(thumbnails={})
+        created = failed = 0
+        for recipe in recipes.iterator():
+            if thumbnails_ready(recipe):
+                continue
+            try:
+                generate_thumbnails(recipe.pk)
+            except Exception as error:
+                failed += 1
+                self.stderr.write(f'Рецепт {recipe.pk}: {error}')
+            else:
+                created += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Созданы миниатюры рецептов: {created}, ошибок: {failed}'
+        ))
@@ -1,29 +1,66 @@
-import csv
-
-from django.core.management.base import BaseCommand
-from foodgram_backend.settings import CSV_DIR
-from recipes.models import Ingredient
+import os
+import time
 
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 
-def import_data():
-    """Чтение файла CSV и создания экземпляров модели"""
-    with open(
-        f'{CSV_DIR}/ingredients.csv',
-        encoding='utf-8'
-    ) as csvfile:
-        reader = csv.DictReader(csvfile)
-        for row in reader:
-            Ingredient.objects.create(
-                name=row['название'],
-                measurement_unit=row['единица измерения'],
-            )
+from foodgram_backend import constants
+from foodgram_backend.settings import CSV_DIR
+from recipes.cache import bump_version
+from recipes.importing import READERS, import_data
 
 
 class Command(BaseCommand):
     help = 'Импорт ингридиентов в базу данных'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--file',
+            default=os.path.join(CSV_DIR, 'ingredients.csv'),
+            help='Путь к файлу CSV или JSON с ингредиентами.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=constants.IMPORT_BATCH_SIZE,
+            help='Количество записей в одном запросе INSERT.'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Выполнить импорт и откатить изменения.'
+        )
+
     def handle(self, *args, **options):
-        import_data()
+        path = options['file']
+        reader = READERS.get(os.path.splitext(path)[1].lower())
+        if reader is None:
+            raise CommandError(
+                f'Поддерживаются файлы: {", ".join(READERS)}'
+            )
+        if options['batch_size'] < 1:
+            raise CommandError('Размер пакета должен быть больше 0')
+        start = time.monotonic()
+        with transaction.atomic():
+            processed, inserted = import_data(
+                reader(path),
+                options['batch_size']
+            )
+            if options['dry_run']:
+                transaction.set_rollback(True)
+            else:
+                transaction.on_commit(lambda: bump_version('ingredients'))
+        duration = time.monotonic() - start
+        if options['dry_run']:
+            message = 'Проверка импорта завершена, изменения отменены'
+        else:
+            message = 'Ингридиенты успешно загружены в базу'
         self.stdout.write(
-            self.style.SUCCESS('Ингридиенты успешно загружены в базу')
+            self.style.SUCCESS(
+                f'{message}: '
+                f'добавлено {inserted}, '
+                f'пропущено {processed - inserted}, '
+                f'{processed / duration if duration else processed:.0f} '
+                'записей/с'
+            )
         )
@@ -0,0 +1,129 @@
+import statistics
+import threading
+import time
+from wsgiref.util import setup_testing_defaults
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.core.wsgi import get_wsgi_application
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+
+def run_worker(application, environ, deadline, timings, errors):
+    """Отправка запросов приложению до истечения времени теста."""
+    try:
+        while time.perf_counter() < deadline:
+            start_response_status = []
+            start = time.perf_counter()
+            response = application(
+                dict(environ),
+                lambda status, headers, exc_info=None: (
+                    start_response_status.append(status)
+                )
+            )
+            try:
+                b''.join(response)
+            finally:
+                response.close()
+            timings.append((time.perf_counter() - start) * 1000)
+            if not start_response_status[0].startswith('200'):
+                errors.append(start_response_status[0])
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест API: запросов в секунду с новым соединением '
+        'с БД на каждый запрос и с постоянными соединениями'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default='/api/recipes/',
+            help='Адрес запроса.'
+        )
+        parser.add_argument(
+            '--token',
+            help='Токен пользователя, от имени которого выполняются запросы.'
+        )
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=4,
+            help='Количество параллельных клиентов.'
+        )
+        parser.add_argument(
+            '--duration',
+            type=float,
+            default=10,
+            help='Длительность каждого теста в секундах.'
+        )
+        parser.add_argument(
+            '--conn-max-age',
+            type=int,
+            default=settings.DATABASES['default'].get('CONN_MAX_AGE') or 60,
+            help='CONN_MAX_AGE для теста с постоянными соединениями.'
+        )
+
+    def handle(self, *args, **options):
+        application = get_wsgi_application()
+        path, _, query = options['path'].partition('?')
+        environ = {
+            'PATH_INFO': path,
+            'QUERY_STRING': query,
+            'HTTP_HOST': next(
+                (host.lstrip('.') for host in settings.ALLOWED_HOSTS
+                 if host != '*'),
+                'localhost'
+            ),
+        }
+        if options['token']:
+            environ['HTTP_AUTHORIZATION'] = f'Token {options["token"]}'
+        setup_testing_defaults(environ)
+        database = connections.databases['default']
+        initial_max_age = database.get('CONN_MAX_AGE', 0)
+        created = []
+
+        def count_connection(**kwargs):
+            created.append(1)
+
+        connection_created.connect(count_connection)
+        connections.close_all()
+        try:
+            for max_age in (0, options['conn_max_age']):
+                database['CONN_MAX_AGE'] = max_age
+                created.clear()
+                timings, errors = [], []
+                deadline = time.perf_counter() + options['duration']
+                workers = [
+                    threading.Thread(
+                        target=run_worker,
+                        args=(application, environ, deadline, timings, errors)
+                    )
+                    for _ in range(options['threads'])
+                ]
+                for worker in workers:
+                    worker.start()
+                for worker in workers:
+                    worker.join()
+                self.report(max_age, timings, errors, len(created), options)
+        finally:
+            connection_created.disconnect(count_connection)
+            database['CONN_MAX_AGE'] = initial_max_age
+
+    def report(self, max_age, timings, errors, created, options):
+        if not timings:
+            self.stderr.write(f'CONN_MAX_AGE={max_age}: нет ответов')
+            return
+        self.stdout.write(
+            f'CONN_MAX_AGE={max_age}: '
+            f'{len(timings) / options["duration"]:.1f} запросов/с, '
+            f'медиана {statistics.median(timings):.2f} мс, '
+            f'p95 {statistics.quantiles(timings, n=20)[-1]:.2f} мс, '
+            f'соединений с БД {created}, ошибок {len(errors)}'
+        )
+        if errors:
+            self.stderr.write(f'Коды ответов с ошибкой: {set(errors)}')
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from foodgram_backend import constants
+from recipes.models import Recipe
+from recipes.search import update_search_index
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает поисковый индекс всех рецептов'
+
+    def handle(self, *args, **options):
+        recipe_ids = list(
+            Recipe.objects.order_by('pk').values_list('pk', flat=True)
+        )
+        for start in range(
+            0,
+            len(recipe_ids),
+            constants.SEARCH_INDEX_BATCH_SIZE
+        ):
+            update_search_index(
+                recipe_ids[start:start + constants.SEARCH_INDEX_BATCH_SIZE]
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Проиндексировано рецептов: {len(recipe_ids)}'
+        ))
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.counters import COUNTERS, reconcile
+
+
+class Command(BaseCommand):
+    help = (
+        'Сверяет счетчики избранного, списков покупок, рецептов и '
+        'подписчиков с количеством записей и исправляет расхождения'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только вывести расхождения, не исправляя их.'
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        with transaction.atomic():
+            for model, field, related_model, related_field in COUNTERS:
+                drifted = reconcile(
+                    model,
+                    field,
+                    related_model,
+                    related_field,
+                    dry_run=options['dry_run']
+                )
+                total += len(drifted)
+                if drifted:
+                    self.stdout.write(self.style.WARNING(
+                        f'{model.__name__}.{field}: расхождений '
+                        f'{len(drifted)}, id {drifted[:20]}'
+                    ))
+        action = 'Найдено' if options['dry_run'] else 'Исправлено'
+        self.stdout.write(self.style.SUCCESS(
+            f'{action} расхождений: {total}'
+        ))
@@ -0,0 +1,86 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from foodgram_backend import constants
+from recipes.seeding import seed_dataset
+
+
+class Command(BaseCommand):
+    help = (
+        'Наполняет базу синтетическими пользователями, рецептами, '
+        'избранным, списками покупок и подписками. При одинаковом '
+        '--seed данные совпадают'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--recipes', type=int, default=100000)
+        parser.add_argument(
+            '--favorites',
+            type=int,
+            default=500000,
+            help='Всего записей в избранном.'
+        )
+        parser.add_argument(
+            '--carts',
+            type=int,
+            default=100000,
+            help='Всего записей в списках покупок.'
+        )
+        parser.add_argument(
+            '--subscriptions',
+            type=int,
+            default=100000,
+            help='Всего подписок.'
+        )
+        parser.add_argument(
+            '--zipf',
+            type=float,
+            default=constants.SEED_ZIPF_EXPONENT,
+            help='Показатель степени распределения популярности.'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=constants.SEED_BATCH_SIZE
+        )
+        parser.add_argument(
+            '--prefix',
+            default='seed',
+            help='Префикс имен и email пользователей.'
+        )
+        parser.add_argument(
+            '--no-search-index',
+            action='store_true',
+            help='Не обновлять поисковый индекс рецептов.'
+        )
+
+    def handle(self, *args, **options):
+        if options['users'] < 2 or options['recipes'] < 1:
+            raise CommandError('Нужно не меньше 2 пользователей и 1 рецепта')
+        if options['zipf'] <= 0:
+            raise CommandError('Показатель степени должен быть больше 0')
+        started = time.perf_counter()
+        with transaction.atomic():
+            _, _, rows = seed_dataset(
+                random.Random(options['seed']),
+                options['users'],
+                options['recipes'],
+                options['favorites'],
+                options['carts'],
+                options['subscriptions'],
+                prefix=options['prefix'],
+                exponent=options['zipf'],
+                batch_size=options['batch_size'],
+                search_index=not options['no_search_index']
+            )
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Записано строк: {rows} за {elapsed:.1f} с '
+            f'({rows / elapsed:.0f} строк/с). '
+            'Рейтинг популярности обновляется командой update_trending'
+        ))
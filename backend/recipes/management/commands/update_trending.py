@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from recipes.trending import update_trending
+
+
+class Command(BaseCommand):
+    help = (
+        'Обновляет рейтинг популярности рецептов с учетом давности. '
+        'Запускается периодически, например из cron'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Пересчитать рейтинг всех рецептов с нуля.'
+        )
+
+    def handle(self, *args, **options):
+        updated = update_trending(full=options['full'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Обновлен рейтинг рецептов: {updated}'
+        ))
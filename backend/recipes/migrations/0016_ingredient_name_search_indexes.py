@@ -0,0 +1,44 @@
+from django.db import migrations
+
+INDEXES = (
+    (
+        'recipes_ingredient_name_upper_like',
+        'UPPER("name"::text) text_pattern_ops',
+        'btree',
+    ),
+    (
+        'recipes_ingredient_name_upper_trgm',
+        'UPPER("name"::text) gin_trgm_ops',
+        'gin',
+    ),
+)
+
+
+def create_indexes(apps, schema_editor):
+    """Индексы для поиска по началу и вхождению названия на PostgreSQL."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, expression, method in INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{name}" '
+            f'ON "recipes_ingredient" USING {method} ({expression})'
+        )
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _, _ in INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{name}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0015_auto_20230909_1428'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.3 on 2026-10-18 17:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0017_recipe_modified_date'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tagrecipe',
+            index=models.Index(fields=['tag', 'recipe'], name='tagrecipe_tag_recipe_idx'),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 3.2.3 on 2026-10-18 17:32
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+from foodgram_backend.migration_operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0018_tagrecipe_tag_recipe_idx'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='ingredientrecipe',
+            index=models.Index(fields=['ingredient', 'recipe'], name='ingredientrecipe_ingr_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='recipe',
+            index=models.Index(fields=['-pub_date', '-id'], name='recipe_pub_date_id_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='recipe',
+            index=models.Index(fields=['author', '-pub_date'], name='recipe_author_pub_date_idx'),
+        ),
+        migrations.AlterField(
+            model_name='favorite',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='favorites', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь'),
+        ),
+        migrations.AlterField(
+            model_name='ingredientrecipe',
+            name='ingredient',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='recipe_ingredients', to='recipes.ingredient'),
+        ),
+        migrations.AlterField(
+            model_name='ingredientrecipe',
+            name='recipe',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='recipe_ingredients', to='recipes.recipe'),
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='author',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='recipes', to=settings.AUTH_USER_MODEL, verbose_name='Автор публикации'),
+        ),
+        migrations.AlterField(
+            model_name='shoppingcart',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='shopping_cart', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь'),
+        ),
+        migrations.AlterField(
+            model_name='tagrecipe',
+            name='tag',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='recipe_tags', to='recipes.tag'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.3 on 2026-10-18 17:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0019_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='thumbnails',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Миниатюры изображения'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 3.2.3 on 2026-10-18 17:40
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+COUNTERS = (
+    ('recipes', 'Recipe', 'favorites_count', 'recipes', 'Favorite', 'recipe'),
+    ('recipes', 'Recipe', 'in_carts_count',
+     'recipes', 'ShoppingCart', 'recipe'),
+    ('users', 'User', 'recipes_count', 'recipes', 'Recipe', 'author'),
+    ('users', 'User', 'followers_count',
+     'users', 'Subscription', 'following'),
+)
+
+
+def fill_counters(apps, schema_editor):
+    """Заполнение счетчиков по существующим записям."""
+    for app, model, field, related_app, related_model, related_field in (
+        COUNTERS
+    ):
+        related = apps.get_model(related_app, related_model)
+        apps.get_model(app, model).objects.update(**{field: Coalesce(
+            Subquery(
+                related.objects.filter(
+                    **{related_field: OuterRef('pk')}
+                ).order_by().values(related_field).annotate(
+                    count=Count('pk')
+                ).values('count')
+            ),
+            0
+        )})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0020_recipe_thumbnails'),
+        ('users', '0008_user_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Добавили в избранное'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='in_carts_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Добавили в список покупок'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
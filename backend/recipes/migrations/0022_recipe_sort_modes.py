@@ -0,0 +1,44 @@
+# Generated by Django 3.2.3 on 2026-10-18 17:42
+
+from django.db import migrations, models
+import django.db.models.expressions
+
+from foodgram_backend.migration_operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('recipes', '0021_recipe_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='trending_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Добавления в избранное, учтенные в популярности'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='trending_score',
+            field=models.FloatField(default=0, editable=False, verbose_name='Популярность с учетом давности'),
+        ),
+        AddIndexConcurrently(
+            model_name='recipe',
+            index=models.Index(fields=['-favorites_count', '-pub_date', '-id'], name='recipe_popular_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='recipe',
+            index=models.Index(fields=['cooking_time', '-pub_date', '-id'], name='recipe_quickest_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='recipe',
+            index=models.Index(fields=['-trending_score', '-pub_date', '-id'], name='recipe_trending_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='recipe',
+            index=models.Index(condition=models.Q(('favorites_count', django.db.models.expressions.F('trending_count')), _negated=True), fields=['id'], name='recipe_trending_stale_idx'),
+        ),
+    ]
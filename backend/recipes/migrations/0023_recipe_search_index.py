@@ -0,0 +1,69 @@
+from django.db import migrations
+
+from foodgram_backend import constants
+
+INGREDIENT_NAMES = (
+    "COALESCE((SELECT {aggregate} FROM recipes_ingredientrecipe ir "
+    "JOIN recipes_ingredient i ON i.id = ir.ingredient_id "
+    "WHERE ir.recipe_id = recipes_recipe.id), '')"
+)
+
+
+def create_search_index(apps, schema_editor):
+    """Поисковый индекс рецептов: tsvector и GIN в PostgreSQL,
+    таблица FTS5 в SQLite."""
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            'ALTER TABLE recipes_recipe '
+            'ADD COLUMN IF NOT EXISTS search_vector tsvector'
+        )
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS recipe_search_vector_idx '
+            'ON recipes_recipe USING gin (search_vector)'
+        )
+        schema_editor.execute(
+            "UPDATE recipes_recipe SET search_vector = "
+            "setweight(to_tsvector(%s::regconfig, name), 'A') || "
+            "setweight(to_tsvector(%s::regconfig, "
+            + INGREDIENT_NAMES.format(aggregate="string_agg(i.name, ' ')")
+            + "), 'B') || "
+            "setweight(to_tsvector(%s::regconfig, text), 'C')",
+            (constants.SEARCH_CONFIG,) * 3
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            'CREATE VIRTUAL TABLE IF NOT EXISTS recipes_recipe_fts '
+            'USING fts5(name, ingredients, text, '
+            "tokenize='unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(
+            'INSERT INTO recipes_recipe_fts(rowid, name, ingredients, text) '
+            'SELECT id, name, '
+            + INGREDIENT_NAMES.format(aggregate="group_concat(i.name, ' ')")
+            + ', text FROM recipes_recipe'
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            'DROP INDEX IF EXISTS recipe_search_vector_idx'
+        )
+        schema_editor.execute(
+            'ALTER TABLE recipes_recipe DROP COLUMN IF EXISTS search_vector'
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS recipes_recipe_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0022_recipe_sort_modes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
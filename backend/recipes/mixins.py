@@ -0,0 +1,67 @@
+from hashlib import md5
+
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.renderers import JSONRenderer
+
+from .cache import get_or_set, get_version
+
+
+def conditional_response(request, etag, last_modified, render):
+    """Ответ на условный запрос.
+
+    Если данные у клиента актуальны, возвращается ответ 304
+    без формирования тела ответа.
+    """
+    etag = quote_etag(md5(etag.encode()).hexdigest())
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=last_modified
+    )
+    if response is None:
+        response = render()
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+class CachedReferenceMixin:
+    """Кеширование ответов справочников в виде готового JSON.
+
+    Версия данных справочника указывается в атрибуте cache_namespace.
+    Она же используется для ETag и Last-Modified ответа.
+    """
+
+    cache_namespace = None
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve,
+            request,
+            *args,
+            **kwargs
+        )
+
+    def cached_response(self, view, request, *args, **kwargs):
+        version = get_version(self.cache_namespace)
+        key = f'{self.cache_namespace}:{version}:{request.get_full_path()}'
+        return conditional_response(
+            request,
+            key,
+            version // 10 ** 9,
+            lambda: HttpResponse(
+                get_or_set(
+                    key,
+                    lambda: JSONRenderer().render(
+                        view(request, *args, **kwargs).data
+                    )
+                ),
+                content_type='application/json'
+            )
+        )
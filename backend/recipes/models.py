@@ -1,9 +1,10 @@
 from colorfield.fields import ColorField
 from django.core import validators
 from django.db import models
+from django.db.models.functions import RowNumber
 
 from foodgram_backend import constants
-from users.models import User
+from users.models import Subscription, User
 
 
 class Ingredient(models.Model):
@@ -59,12 +60,95 @@ class Tag(models.Model):
         return self.name
 
 
+class RecipeQuerySet(models.QuerySet):
+    """Набор запросов для модели Рецепт."""
+
+    @staticmethod
+    def related_lookups():
+        """Связанные объекты, необходимые для вывода рецепта."""
+        return (
+            'tags',
+            models.Prefetch(
+                'recipe_ingredients',
+                queryset=IngredientRecipe.objects.select_related(
+                    'ingredient'
+                )
+            ),
+        )
+
+    def with_related(self):
+        """Загрузка автора, тегов и ингредиентов рецептов.
+
+        Количество запросов не зависит от числа рецептов на странице.
+        """
+        return self.select_related('author').prefetch_related(
+            *self.related_lookups()
+        )
+
+    def with_user_flags(self, user):
+        """Аннотация отметок "в избранном" и "в списке покупок".
+
+        Для анонимного пользователя подзапросы не добавляются.
+        """
+        if not user.is_authenticated:
+            return self
+        return self.annotate(
+            is_favorited=models.Exists(
+                Favorite.objects.filter(
+                    user=user,
+                    recipe=models.OuterRef('pk')
+                )
+            ),
+            is_in_shopping_cart=models.Exists(
+                ShoppingCart.objects.filter(
+                    user=user,
+                    recipe=models.OuterRef('pk')
+                )
+            ),
+        )
+
+    def followed_by(self, user):
+        """Рецепты авторов, на которых подписан пользователь."""
+        return self.filter(
+            models.Exists(
+                Subscription.objects.filter(
+                    user=user,
+                    following=models.OuterRef('author')
+                )
+            )
+        )
+
+    def latest_per_author(self, limit):
+        """Не более limit последних рецептов каждого автора.
+
+        Рецепты всех авторов выбираются одним запросом, порядковый номер
+        рецепта у автора вычисляется оконной функцией ROW_NUMBER().
+        """
+        ranked = self.order_by().annotate(
+            row_number=models.Window(
+                expression=RowNumber(),
+                partition_by=models.F('author_id'),
+                order_by=(
+                    models.F('pub_date').desc(),
+                    models.F('id').desc()
+                )
+            )
+        )
+        sql, params = ranked.query.sql_with_params()
+        return self.model.objects.raw(
+            f'SELECT * FROM ({sql}) ranked_recipes '
+            'WHERE row_number <= %s ORDER BY author_id, row_number',
+            (*params, limit)
+        )
+
+
 class Recipe(models.Model):
     """Модель Рецепт."""
 
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
+        db_index=False,
         related_name='recipes',
         verbose_name='Автор публикации'
     )
@@ -76,6 +160,12 @@ class Recipe(models.Model):
         upload_to='recipes/',
         verbose_name='Картинка'
     )
+    thumbnails = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name='Миниатюры изображения'
+    )
     text = models.TextField(
         verbose_name='Описание рецепта'
     )
@@ -116,8 +206,63 @@ class Recipe(models.Model):
         auto_now_add=True,
         verbose_name='Дата публикации рецепта'
     )
+    modified_date = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения рецепта'
+    )
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Добавили в избранное'
+    )
+    in_carts_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Добавили в список покупок'
+    )
+    trending_score = models.FloatField(
+        default=0,
+        editable=False,
+        verbose_name='Популярность с учетом давности'
+    )
+    trending_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Добавления в избранное, учтенные в популярности'
+    )
+
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='recipe_pub_date_id_idx'
+            ),
+            models.Index(
+                fields=['author', '-pub_date'],
+                name='recipe_author_pub_date_idx'
+            ),
+            models.Index(
+                fields=['-favorites_count', '-pub_date', '-id'],
+                name='recipe_popular_idx'
+            ),
+            models.Index(
+                fields=['cooking_time', '-pub_date', '-id'],
+                name='recipe_quickest_idx'
+            ),
+            models.Index(
+                fields=['-trending_score', '-pub_date', '-id'],
+                name='recipe_trending_idx'
+            ),
+            models.Index(
+                fields=['id'],
+                condition=~models.Q(
+                    favorites_count=models.F('trending_count')
+                ),
+                name='recipe_trending_stale_idx'
+            ),
+        ]
         ordering = ('-pub_date', )
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
@@ -132,11 +277,13 @@ class IngredientRecipe(models.Model):
     ingredient = models.ForeignKey(
         Ingredient,
         on_delete=models.CASCADE,
+        db_index=False,
         related_name='recipe_ingredients'
     )
     recipe = models.ForeignKey(
         Recipe,
         on_delete=models.CASCADE,
+        db_index=False,
         related_name='recipe_ingredients'
     )
     amount = models.PositiveSmallIntegerField(
@@ -164,6 +311,12 @@ class IngredientRecipe(models.Model):
                 fields=['recipe', 'ingredient'],
                 name='unique ingredient'
             )]
+        indexes = [
+            models.Index(
+                fields=['ingredient', 'recipe'],
+                name='ingredientrecipe_ingr_idx'
+            ),
+        ]
         ordering = ('recipe', )
         verbose_name = 'ингредиент рецепта'
         verbose_name_plural = 'ингредиенты рецепта'
@@ -178,6 +331,7 @@ class TagRecipe(models.Model):
     tag = models.ForeignKey(
         Tag,
         on_delete=models.CASCADE,
+        db_index=False,
         related_name='recipe_tags'
     )
     recipe = models.ForeignKey(
@@ -187,6 +341,12 @@ class TagRecipe(models.Model):
     )
 
     class Meta:
+        indexes = [
+            models.Index(
+                fields=['tag', 'recipe'],
+                name='tagrecipe_tag_recipe_idx'
+            ),
+        ]
         ordering = ('tag', )
         verbose_name = 'тег рецепта'
         verbose_name_plural = 'теги рецепта'
@@ -201,6 +361,7 @@ class CustomModel(models.Model):
     user = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
+        db_index=False,
         verbose_name='Пользователь'
     )
     recipe = models.ForeignKey(
@@ -1,11 +1,113 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 from foodgram_backend import constants
 
 
+def keyset_filter(ordering, values):
+    """Условие выборки записей, следующих за записью со значениями values.
+
+    Записи сравниваются по полям ordering в лексикографическом порядке.
+    """
+    query = Q()
+    for index, field in enumerate(ordering):
+        condition = Q(**{
+            f'{field.lstrip("-")}__{"lt" if field[0] == "-" else "gt"}':
+            values[index]
+        })
+        for previous, value in zip(ordering[:index], values):
+            condition &= Q(**{previous.lstrip('-'): value})
+        query |= condition
+    return query
+
+
 class CustomPagination(PageNumberPagination):
-    """Пользовательский пагинатор."""
+    """Пользовательский пагинатор.
+
+    Если в запросе передан параметр cursor, а представление задает
+    порядок записей в атрибуте cursor_ordering, используется пагинация
+    по ключу: без подсчета записей и OFFSET, страницы не смещаются при
+    добавлении новых записей. Пустой cursor - первая страница.
+    """
 
     page_size = constants.PAGE_SIZE
     page_size_query_param = 'limit'
     max_page_size = constants.MAX_PAGE_SIZE
+    cursor_query_param = 'cursor'
+    cursor_ordering = None
+
+    def use_keyset(self, request):
+        return self.cursor_query_param in request.query_params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_ordering = getattr(view, 'cursor_ordering', None)
+        if self.cursor_ordering is None or not self.use_keyset(request):
+            self.cursor_ordering = None
+            return super().paginate_queryset(queryset, request, view)
+        self.request = request
+        page_size = self.get_page_size(request)
+        queryset = queryset.order_by(*self.cursor_ordering)
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            try:
+                queryset = queryset.filter(
+                    keyset_filter(
+                        self.cursor_ordering,
+                        self.decode_cursor(cursor)
+                    )
+                )
+            except (DjangoValidationError, TypeError, ValueError):
+                raise NotFound('Неверный курсор.')
+        results = list(queryset[:page_size + 1])
+        self.next_cursor = None
+        if len(results) > page_size:
+            results = results[:page_size]
+            self.next_cursor = self.encode_cursor(results[-1])
+        return results
+
+    def encode_cursor(self, obj):
+        values = [
+            getattr(obj, field.lstrip('-')) for field in self.cursor_ordering
+        ]
+        return urlsafe_b64encode(
+            json.dumps(values, default=str).encode()
+        ).decode()
+
+    def decode_cursor(self, cursor):
+        values = json.loads(urlsafe_b64decode(cursor.encode()))
+        if (
+            not isinstance(values, list)
+            or len(values) != len(self.cursor_ordering)
+        ):
+            raise ValueError('Неверный курсор.')
+        return values
+
+    def get_paginated_response(self, data):
+        if self.cursor_ordering is None:
+            return super().get_paginated_response(data)
+        next_link = None
+        if self.next_cursor is not None:
+            next_link = replace_query_param(
+                self.request.build_absolute_uri(),
+                self.cursor_query_param,
+                self.next_cursor
+            )
+        return Response(OrderedDict((
+            ('next', next_link),
+            ('results', data),
+        )))
+
+
+class KeysetPagination(CustomPagination):
+    """Пагинатор, всегда использующий пагинацию по ключу."""
+
+    def use_keyset(self, request):
+        return True
@@ -0,0 +1,121 @@
+import re
+
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+from foodgram_backend import constants
+
+# Поля рецепта, входящие в индекс вместе с названиями ингредиентов.
+INDEXED_FIELDS = ('name', 'text')
+INGREDIENT_NAMES = (
+    "COALESCE((SELECT {aggregate} FROM recipes_ingredientrecipe ir "
+    "JOIN recipes_ingredient i ON i.id = ir.ingredient_id "
+    "WHERE ir.recipe_id = recipes_recipe.id), '')"
+)
+POSTGRESQL_UPDATE = (
+    "UPDATE recipes_recipe SET search_vector = "
+    "setweight(to_tsvector(%s::regconfig, name), 'A') || "
+    "setweight(to_tsvector(%s::regconfig, "
+    + INGREDIENT_NAMES.format(aggregate="string_agg(i.name, ' ')")
+    + "), 'B') || "
+    "setweight(to_tsvector(%s::regconfig, text), 'C') "
+    "WHERE id = ANY(%s)"
+)
+POSTGRESQL_QUERY = 'websearch_to_tsquery(%s::regconfig, %s)'
+SQLITE_DELETE = 'DELETE FROM recipes_recipe_fts WHERE rowid IN ({ids})'
+SQLITE_INSERT = (
+    'INSERT INTO recipes_recipe_fts(rowid, name, ingredients, text) '
+    'SELECT id, name, '
+    + INGREDIENT_NAMES.format(aggregate="group_concat(i.name, ' ')")
+    + ', text FROM recipes_recipe WHERE id IN ({ids})'
+)
+SQLITE_MATCH = (
+    'SELECT rowid FROM recipes_recipe_fts WHERE recipes_recipe_fts MATCH %s'
+)
+SQLITE_RANK = (
+    '(SELECT -bm25(recipes_recipe_fts, %s, %s, %s) FROM recipes_recipe_fts '
+    'WHERE recipes_recipe_fts MATCH %s AND rowid = recipes_recipe.id)'
+)
+# Окончания слов, отбрасываемые перед поиском по префиксу в SQLite.
+RUSSIAN_ENDINGS = re.compile(
+    r'(?<=\w{3})(?:ами|ями|ого|его|ому|ему|ыми|ими|ой|ей|ий|ый|ая|яя|ое|ее|'
+    r'ые|ие|ам|ям|ах|ях|ов|ев|ом|ем|а|я|о|е|ы|и|у|ю|ь|й)$'
+)
+
+
+def update_search_index(recipe_ids):
+    """Обновление поискового индекса рецептов."""
+    recipe_ids = list(recipe_ids)
+    if not recipe_ids:
+        return
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                POSTGRESQL_UPDATE,
+                (*(constants.SEARCH_CONFIG,) * 3, recipe_ids)
+            )
+        elif connection.vendor == 'sqlite':
+            ids = ', '.join(['%s'] * len(recipe_ids))
+            cursor.execute(SQLITE_DELETE.format(ids=ids), recipe_ids)
+            cursor.execute(SQLITE_INSERT.format(ids=ids), recipe_ids)
+
+
+def remove_from_search_index(recipe_ids):
+    """Удаление рецептов из поискового индекса SQLite.
+
+    В PostgreSQL индекс хранится в строке рецепта и удаляется вместе с ней.
+    """
+    recipe_ids = list(recipe_ids)
+    if recipe_ids and connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                SQLITE_DELETE.format(ids=', '.join(['%s'] * len(recipe_ids))),
+                recipe_ids
+            )
+
+
+def get_fts_query(value):
+    """Запрос FTS5: все слова, без окончаний, с поиском по префиксу."""
+    return ' '.join(
+        f'"{RUSSIAN_ENDINGS.sub("", word)}"*'
+        for word in re.findall(r'\w+', value.casefold())
+    )
+
+
+def search_recipes(queryset, value):
+    """Полнотекстовый поиск рецептов по названию, ингредиентам и описанию.
+
+    Найденным рецептам добавляется релевантность search_rank: чем больше,
+    тем выше рецепт в результатах. В PostgreSQL используются сохраненные
+    векторы с русской морфологией, в SQLite - таблица FTS5 и BM25.
+    """
+    if connection.vendor == 'postgresql':
+        query_params = (constants.SEARCH_CONFIG, value)
+        return queryset.filter(
+            RawSQL(
+                f'recipes_recipe.search_vector @@ {POSTGRESQL_QUERY}',
+                query_params,
+                output_field=BooleanField()
+            )
+        ).annotate(search_rank=RawSQL(
+            f'ts_rank(recipes_recipe.search_vector, {POSTGRESQL_QUERY})',
+            query_params,
+            output_field=FloatField()
+        ))
+    if connection.vendor == 'sqlite':
+        query = get_fts_query(value)
+        if not query:
+            return queryset.annotate(
+                search_rank=Value(0.0, output_field=FloatField())
+            ).none()
+        return queryset.filter(
+            pk__in=RawSQL(SQLITE_MATCH, (query,))
+        ).annotate(search_rank=RawSQL(
+            SQLITE_RANK,
+            (*constants.SEARCH_FTS_WEIGHTS, query),
+            output_field=FloatField()
+        ))
+    return queryset.filter(
+        Q(name__icontains=value) | Q(text__icontains=value)
+    ).annotate(search_rank=Value(0.0, output_field=FloatField()))
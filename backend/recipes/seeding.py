@@ -0,0 +1,325 @@
+import csv
+import io
+import json
+import os
+from collections import Counter
+from datetime import datetime, timedelta
+from itertools import accumulate, islice
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from PIL import Image
+
+from foodgram_backend import constants
+from users.models import Subscription, User
+from .cache import bump_version
+from .images import create_thumbnails
+from .importing import import_data, read_csv
+from .models import (Favorite, Ingredient, IngredientRecipe, Recipe,
+                     ShoppingCart, Tag, TagRecipe)
+from .search import update_search_index
+
+TAGS = (
+    ('Завтрак', '#E26C2D', 'breakfast'),
+    ('Обед', '#49B64E', 'lunch'),
+    ('Ужин', '#8775D2', 'dinner'),
+)
+SEED_IMAGE = 'recipes/seed.png'
+WORDS = (
+    'суп', 'салат', 'пирог', 'рагу', 'каша', 'запеканка', 'омлет',
+    'котлеты', 'плов', 'паста', 'блины', 'жаркое', 'борщ', 'соус',
+)
+# Поля, значения которых передаются в базу без преобразования.
+PLAIN_FIELDS = {
+    'AutoField', 'BigAutoField', 'CharField', 'EmailField', 'FileField',
+    'FloatField', 'ForeignKey', 'IntegerField', 'PositiveIntegerField',
+    'PositiveSmallIntegerField',
+    'SlugField', 'SmallIntegerField', 'TextField',
+}
+
+
+class ZipfSampler:
+    """Случайный выбор id с вероятностью, обратной рангу в степени s.
+
+    Ранги назначаются id в случайном порядке, поэтому популярные
+    записи не совпадают с первыми id.
+    """
+
+    def __init__(self, rnd, ids, exponent):
+        self.rnd = rnd
+        self.ids = list(ids)
+        rnd.shuffle(self.ids)
+        self.cum_weights = list(accumulate(
+            1 / rank ** exponent for rank in range(1, len(self.ids) + 1)
+        ))
+
+    def sample(self, count):
+        return self.rnd.choices(
+            self.ids,
+            cum_weights=self.cum_weights,
+            k=count
+        )
+
+
+class TableWriter:
+    """Пакетная запись строк в таблицу модели.
+
+    В PostgreSQL используется COPY, в остальных базах - executemany
+    одного INSERT. Поля без значений получают значения по умолчанию.
+    """
+
+    def __init__(self, model, fields, batch_size):
+        self.model = model
+        self.batch_size = batch_size
+        meta = model._meta
+        self.fields = [meta.get_field(name) for name in fields]
+        self.defaults = [
+            (field, field.get_default()) for field in meta.concrete_fields
+            if field not in self.fields
+            and not field.primary_key
+            and not field.null
+        ]
+        columns = [field.column for field in self.fields] + [
+            field.column for field, _ in self.defaults
+        ]
+        quote = connection.ops.quote_name
+        self.table = quote(meta.db_table)
+        self.columns = ', '.join(quote(column) for column in columns)
+        self.rows = 0
+
+    def write(self, rows):
+        rows = iter(rows)
+        while batch := list(islice(rows, self.batch_size)):
+            if connection.vendor == 'postgresql':
+                self.copy(batch)
+            else:
+                self.insert(batch)
+            self.rows += len(batch)
+
+    def copy(self, batch):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        defaults = [value for _, value in self.defaults]
+        for row in batch:
+            writer.writerow(
+                self.to_copy(value) for value in (*row, *defaults)
+            )
+        buffer.seek(0)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f'COPY {self.table} ({self.columns}) '
+                'FROM STDIN WITH (FORMAT csv)',
+                buffer
+            )
+
+    @staticmethod
+    def to_copy(value):
+        if isinstance(value, bool):
+            return 't' if value else 'f'
+        if isinstance(value, (dict, list)):
+            return json.dumps(value)
+        if isinstance(value, datetime):
+            return value.isoformat()
+        return value
+
+    def insert(self, batch):
+        defaults = [
+            field.get_db_prep_save(value, connection)
+            for field, value in self.defaults
+        ]
+        prepared = [
+            index for index, field in enumerate(self.fields)
+            if field.get_internal_type() not in PLAIN_FIELDS
+        ]
+        rows = []
+        for row in batch:
+            row = list(row)
+            for index in prepared:
+                row[index] = self.fields[index].get_db_prep_save(
+                    row[index],
+                    connection
+                )
+            rows.append((*row, *defaults))
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {self.table} ({self.columns}) VALUES '
+                f'({", ".join(["%s"] * len(rows[0]))})',
+                rows
+            )
+
+
+def get_next_id(model):
+    return (model.objects.aggregate(last_id=Max('pk'))['last_id'] or 0) + 1
+
+
+def seed_references():
+    """Ингредиенты из data/ingredients.csv и теги, если их нет.
+
+    После записи справочников меняются их версии, чтобы не отдавались
+    ответы, закешированные до наполнения базы.
+    """
+    if not Ingredient.objects.exists():
+        import_data(
+            read_csv(os.path.join(settings.CSV_DIR, 'ingredients.csv')),
+            constants.IMPORT_BATCH_SIZE
+        )
+        transaction.on_commit(lambda: bump_version('ingredients'))
+    tags_created = [
+        Tag.objects.get_or_create(
+            slug=slug,
+            defaults={'name': name, 'color': color}
+        )[1]
+        for name, color, slug in TAGS
+    ]
+    if any(tags_created):
+        transaction.on_commit(lambda: bump_version('tags'))
+    return (
+        list(Ingredient.objects.order_by('pk').values_list('pk', flat=True)),
+        list(Tag.objects.order_by('pk').values_list('pk', flat=True)),
+    )
+
+
+def seed_image():
+    """Изображение-заглушка для рецептов и его миниатюры.
+
+    Файл создается в хранилище один раз и используется всеми
+    синтетическими рецептами, миниатюры сразу записываются в рецепты.
+    """
+    if not default_storage.exists(SEED_IMAGE):
+        buffer = io.BytesIO()
+        Image.new(
+            'RGB',
+            constants.SEED_IMAGE_SIZE,
+            constants.SEED_IMAGE_COLOR
+        ).save(buffer, 'PNG')
+        default_storage.save(SEED_IMAGE, ContentFile(buffer.getvalue()))
+    return create_thumbnails(SEED_IMAGE)
+
+
+def unique_pairs(left, right, total, exclude_self=False):
+    """Уникальные пары (left, right) из двух генераторов, не больше total.
+
+    Если популярные пары заняты и новых почти не находится, генерация
+    останавливается раньше.
+    """
+    seen = dict()
+    for _ in range(constants.SEED_PAIR_ROUNDS):
+        missing = total - len(seen)
+        if missing <= 0:
+            break
+        for pair in zip(left.sample(missing), right.sample(missing)):
+            if not (exclude_self and pair[0] == pair[1]):
+                seen[pair] = None
+    return list(islice(seen, total))
+
+
+def seed_dataset(rnd, users, recipes, favorites, carts, subscriptions,
+                 prefix='seed', exponent=constants.SEED_ZIPF_EXPONENT,
+                 batch_size=constants.SEED_BATCH_SIZE, search_index=True):
+    """Синтетические пользователи, рецепты, избранное, покупки и подписки.
+
+    Авторы рецептов, популярность рецептов и авторов в подписках
+    распределены по закону Ципфа. Все случайные значения берутся из
+    генератора rnd, поэтому при одинаковом начальном значении данные
+    совпадают. Счетчики заполняются сразу при вставке. Возвращает
+    id пользователей, id рецептов и количество записанных строк.
+    """
+    ingredient_ids, tag_ids = seed_references()
+    thumbnails = seed_image()
+    now = timezone.now()
+    user_ids = range(get_next_id(User), get_next_id(User) + users)
+    recipe_ids = range(get_next_id(Recipe), get_next_id(Recipe) + recipes)
+    authors = ZipfSampler(rnd, user_ids, exponent).sample(recipes)
+    active_users = ZipfSampler(rnd, user_ids, exponent)
+    popular_recipes = ZipfSampler(rnd, recipe_ids, exponent)
+    favorite_pairs = unique_pairs(active_users, popular_recipes, favorites)
+    cart_pairs = unique_pairs(active_users, popular_recipes, carts)
+    subscription_pairs = unique_pairs(
+        active_users,
+        ZipfSampler(rnd, user_ids, exponent),
+        subscriptions,
+        exclude_self=True
+    )
+    recipes_count = Counter(authors)
+    followers_count = Counter(following for _, following in subscription_pairs)
+    favorites_count = Counter(recipe for _, recipe in favorite_pairs)
+    carts_count = Counter(recipe for _, recipe in cart_pairs)
+    writers = []
+
+    def write(model, fields, rows):
+        writer = TableWriter(model, fields, batch_size)
+        writer.write(rows)
+        writers.append(writer)
+
+    password = make_password(constants.SEED_PASSWORD)
+    write(User, (
+        'id', 'email', 'username', 'first_name', 'last_name', 'password',
+        'recipes_count', 'followers_count',
+    ), (
+        (
+            user_id, f'{prefix}{user_id}@example.com', f'{prefix}{user_id}',
+            f'Имя{user_id}', f'Фамилия{user_id}', password,
+            recipes_count[user_id], followers_count[user_id],
+        )
+        for user_id in user_ids
+    ))
+    days = constants.SEED_DAYS
+    write(Recipe, (
+        'id', 'author', 'name', 'image', 'thumbnails', 'text',
+        'cooking_time', 'pub_date', 'modified_date', 'favorites_count',
+        'in_carts_count',
+    ), (
+        (
+            recipe_id, author,
+            f'{rnd.choice(WORDS).capitalize()} {recipe_id}',
+            SEED_IMAGE, thumbnails, ' '.join(rnd.choices(WORDS, k=20)),
+            rnd.randint(
+                constants.MIN_TIME_COOK,
+                constants.SEED_MAX_COOKING_TIME
+            ),
+            pub_date, pub_date,
+            favorites_count[recipe_id], carts_count[recipe_id],
+        )
+        for recipe_id, author, pub_date in (
+            (recipe_id, author, now - timedelta(days=rnd.random() * days))
+            for recipe_id, author in zip(recipe_ids, authors)
+        )
+    ))
+    ingredients = ZipfSampler(rnd, ingredient_ids, exponent)
+    write(IngredientRecipe, ('recipe', 'ingredient', 'amount'), (
+        (recipe_id, ingredient_id, rnd.randint(1, 500))
+        for recipe_id in recipe_ids
+        for ingredient_id in dict.fromkeys(ingredients.sample(
+            rnd.randint(*constants.SEED_INGREDIENTS_PER_RECIPE)
+        ))
+    ))
+    write(TagRecipe, ('recipe', 'tag'), (
+        (recipe_id, tag_id)
+        for recipe_id in recipe_ids
+        for tag_id in rnd.sample(tag_ids, rnd.randint(1, len(tag_ids)))
+    ))
+    write(Favorite, ('user', 'recipe'), favorite_pairs)
+    write(ShoppingCart, ('user', 'recipe'), cart_pairs)
+    write(Subscription, ('user', 'following'), subscription_pairs)
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(
+            no_style(),
+            [writer.model for writer in writers]
+        ):
+            cursor.execute(sql)
+    if search_index:
+        for start in range(0, recipes, constants.SEARCH_INDEX_BATCH_SIZE):
+            update_search_index(
+                recipe_ids[start:start + constants.SEARCH_INDEX_BATCH_SIZE]
+            )
+    return (
+        list(user_ids),
+        list(recipe_ids),
+        sum(writer.rows for writer in writers)
+    )
@@ -1,12 +1,16 @@
-from drf_extra_fields.fields import Base64ImageField
+from django.db import transaction
+from django.db.models import prefetch_related_objects
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 from rest_framework.validators import UniqueTogetherValidator
 
 from foodgram_backend import constants
 from users.serializers import CustomUserSerializer
+from .fields import (BulkPrimaryKeyRelatedField, RecipeImageField,
+                     ThumbnailField)
 from .models import (Favorite, Ingredient, IngredientRecipe, Recipe,
-                     ShoppingCart, Tag)
+                     RecipeQuerySet, ShoppingCart, Tag)
+from .search import INDEXED_FIELDS, update_search_index
 
 
 class IngredientSerializer(serializers.ModelSerializer):
@@ -44,13 +48,26 @@ class IngredientRecipeSerializer(serializers.ModelSerializer):
         )
 
 
+class IngredientRecipeListSerializer(serializers.ListSerializer):
+    """Сериализатор списка ингридиентов рецепта.
+
+    Все ингредиенты загружаются одним запросом.
+    """
+
+    def to_internal_value(self, data):
+        items = super().to_internal_value(data)
+        ingredients = BulkPrimaryKeyRelatedField(
+            queryset=Ingredient.objects.all()
+        ).get_objects([item.pop('ingredient_id') for item in items])
+        for item, ingredient in zip(items, ingredients):
+            item['ingredient'] = ingredient
+        return items
+
+
 class IngredientRecipeShortSerializer(serializers.ModelSerializer):
     """Сериализатор для добавления ингридиентов при создании рецепта."""
 
-    id = serializers.PrimaryKeyRelatedField(
-        queryset=Ingredient.objects.all(),
-        source='ingredient',
-    )
+    id = serializers.IntegerField(source='ingredient_id')
     amount = serializers.IntegerField(
         max_value=constants.MAX_INGREDIENT_VALUE,
         min_value=constants.MIN_INGREDIENT_VALUE
@@ -59,13 +76,15 @@ class IngredientRecipeShortSerializer(serializers.ModelSerializer):
     class Meta:
         model = IngredientRecipe
         fields = ('id', 'amount',)
+        list_serializer_class = IngredientRecipeListSerializer
 
 
 class RecipeListSerializer(serializers.ModelSerializer):
     """Сериализатор модели Recipe для вывода списка рецептов/рецепта."""
 
     author = CustomUserSerializer(read_only=True)
-    image = Base64ImageField()
+    image = ThumbnailField('full')
+    thumbnails = ThumbnailField()
     tags = TagSerializer(many=True)
     ingredients = IngredientRecipeSerializer(
         many=True,
@@ -83,29 +102,52 @@ class RecipeListSerializer(serializers.ModelSerializer):
             'ingredients',
             'is_favorited',
             'is_in_shopping_cart',
+            'favorites_count',
             'name',
             'image',
+            'thumbnails',
             'text',
             'cooking_time'
         ]
 
+    def get_user_recipe_ids(self, related_name):
+        """Получение id сериализуемых рецептов, отмеченных пользователем.
+
+        Используется для рецептов без аннотаций: отметки загружаются
+        одним запросом на весь набор рецептов и сохраняются в контексте.
+        """
+        user_recipe_ids = self.context.setdefault('user_recipe_ids', {})
+        if related_name not in user_recipe_ids:
+            recipes = self.root.instance
+            if isinstance(recipes, Recipe):
+                recipes = (recipes,)
+            user_recipe_ids[related_name] = set(
+                getattr(self.context['request'].user, related_name).filter(
+                    recipe__in=[recipe.pk for recipe in recipes]
+                ).order_by().values_list('recipe_id', flat=True)
+            )
+        return user_recipe_ids[related_name]
+
+    def get_user_flag(self, obj, annotation, related_name):
+        """Получение отметки пользователя для рецепта."""
+        request = self.context.get('request')
+        if not (request and request.user.is_authenticated):
+            return False
+        if hasattr(obj, annotation):
+            return getattr(obj, annotation)
+        return obj.pk in self.get_user_recipe_ids(related_name)
+
     def get_is_favorited(self, obj):
         """Получение информации находится ли рецепт в избранном."""
-        request = self.context['request']
-        return bool(
-            request
-            and request.user.is_authenticated
-            and request.user.favorites.filter(recipe=obj).exists()
-        )
+        return self.get_user_flag(obj, 'is_favorited', 'favorites')
 
     def get_is_in_shopping_cart(self, obj):
         """Получение информации находится ли рецепт в
         списке покупок."""
-        request = self.context['request']
-        return bool(
-            request
-            and request.user.is_authenticated
-            and request.user.shopping_cart.filter(recipe=obj).exists()
+        return self.get_user_flag(
+            obj,
+            'is_in_shopping_cart',
+            'shopping_cart'
         )
 
 
@@ -113,8 +155,8 @@ class RecipeSerializer(serializers.ModelSerializer):
     """Сериализатор для создания/редактирования/удаления рецепта."""
 
     author = CustomUserSerializer(read_only=True,)
-    image = Base64ImageField()
-    tags = serializers.PrimaryKeyRelatedField(
+    image = RecipeImageField()
+    tags = BulkPrimaryKeyRelatedField(
         queryset=Tag.objects.all(),
         many=True
     )
@@ -168,6 +210,7 @@ class RecipeSerializer(serializers.ModelSerializer):
                 amount=ingredient.get('amount')
             ) for ingredient in ingredients)
 
+    @transaction.atomic
     def create(self, validated_data):
         """Переопределение метода создания рецепта."""
         tags = validated_data.pop('tags')
@@ -175,21 +218,70 @@ class RecipeSerializer(serializers.ModelSerializer):
         recipe = Recipe.objects.create(**validated_data)
         recipe.tags.set(tags)
         self.add_ingredients(recipe, ingredients)
+        update_search_index([recipe.pk])
         return recipe
 
+    def update_ingredients(self, recipe, ingredients):
+        """Изменение ингредиентов рецепта.
+
+        Добавляются, изменяются и удаляются только те записи,
+        которые отличаются от переданных. Возвращает True, если
+        изменился состав ингредиентов.
+        """
+        current = {
+            item.ingredient_id: item
+            for item in IngredientRecipe.objects.filter(recipe=recipe)
+        }
+        amounts = {
+            item['ingredient'].id: item['amount'] for item in ingredients
+        }
+        deleted = current.keys() - amounts.keys()
+        if deleted:
+            IngredientRecipe.objects.filter(
+                recipe=recipe,
+                ingredient_id__in=deleted
+            ).delete()
+        changed = []
+        for ingredient_id, item in current.items():
+            amount = amounts.get(ingredient_id, item.amount)
+            if item.amount != amount:
+                item.amount = amount
+                changed.append(item)
+        if changed:
+            IngredientRecipe.objects.bulk_update(changed, ('amount',))
+        added = [
+            item for item in ingredients
+            if item['ingredient'].id not in current
+        ]
+        if added:
+            self.add_ingredients(recipe, added)
+        return bool(deleted or added)
+
+    @transaction.atomic
     def update(self, instance, validated_data):
-        """Переопределение метода редактирования рецепта."""
+        """Переопределение метода редактирования рецепта.
+
+        Поисковый индекс обновляется, только если изменились
+        проиндексированные поля или состав ингредиентов.
+        """
         tags = validated_data.pop('tags')
         ingredients = validated_data.pop('ingredients')
-
-        IngredientRecipe.objects.filter(recipe=instance).delete()
+        indexed = [getattr(instance, field) for field in INDEXED_FIELDS]
 
         instance.tags.set(tags)
-        self.add_ingredients(instance, ingredients)
-
-        return super().update(instance, validated_data)
+        ingredients_changed = self.update_ingredients(instance, ingredients)
+        instance = super().update(instance, validated_data)
+        if ingredients_changed or indexed != [
+            getattr(instance, field) for field in INDEXED_FIELDS
+        ]:
+            update_search_index([instance.pk])
+        return instance
 
     def to_representation(self, instance):
+        prefetch_related_objects(
+            [instance],
+            *RecipeQuerySet.related_lookups()
+        )
         serializer = RecipeListSerializer(
             instance,
             context={'request': self.context.get('request')}
@@ -226,3 +318,13 @@ class ShoppingCartSerializer(serializers.ModelSerializer):
                 message='Этот рецепт уже добавлен в список покупок'
             )
         ]
+
+
+class RecipeIdsSerializer(serializers.Serializer):
+    """Список id рецептов для массового добавления/удаления."""
+
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=constants.BULK_MAX_RECIPES
+    )
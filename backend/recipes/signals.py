@@ -0,0 +1,107 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from users.models import User
+from .cache import bump_version
+from .feed import invalidate_follower_feeds
+from .images import schedule_thumbnails
+from .models import Favorite, Ingredient, Recipe, ShoppingCart, Tag
+from .search import remove_from_search_index, update_search_index
+
+COUNTERS = {
+    Favorite: 'favorites_count',
+    ShoppingCart: 'in_carts_count',
+}
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def invalidate_ingredients(**kwargs):
+    """Сброс кеша ингредиентов при их изменении."""
+    transaction.on_commit(lambda: bump_version('ingredients'))
+
+
+@receiver(post_save, sender=Ingredient)
+def reindex_ingredient_recipes(instance, created, **kwargs):
+    """Обновление поискового индекса рецептов с измененным ингредиентом."""
+    if not created:
+        update_search_index(
+            instance.recipe_ingredients.values_list('recipe_id', flat=True)
+        )
+
+
+@receiver(pre_delete, sender=Ingredient)
+def reindex_ingredient_recipes_on_delete(instance, **kwargs):
+    """Обновление поискового индекса рецептов с удаляемым ингредиентом."""
+    recipe_ids = list(
+        instance.recipe_ingredients.values_list('recipe_id', flat=True)
+    )
+    if recipe_ids:
+        transaction.on_commit(lambda: update_search_index(recipe_ids))
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def invalidate_tags(**kwargs):
+    """Сброс кеша тегов при их изменении."""
+    transaction.on_commit(lambda: bump_version('tags'))
+
+
+@receiver(post_save, sender=Recipe)
+def create_thumbnails(instance, **kwargs):
+    """Создание миниатюр изображения рецепта после сохранения."""
+    transaction.on_commit(lambda: schedule_thumbnails(instance))
+
+
+@receiver(post_save, sender=Recipe)
+def increment_recipes_count(instance, created, **kwargs):
+    """Увеличение счетчика рецептов автора."""
+    if created:
+        User.objects.filter(pk=instance.author_id).update(
+            recipes_count=F('recipes_count') + 1
+        )
+
+
+@receiver(post_delete, sender=Recipe)
+def decrement_recipes_count(instance, **kwargs):
+    """Уменьшение счетчика рецептов автора."""
+    User.objects.filter(pk=instance.author_id).update(
+        recipes_count=F('recipes_count') - 1
+    )
+
+
+@receiver(post_delete, sender=Recipe)
+def remove_recipe_from_search(instance, **kwargs):
+    """Удаление рецепта из поискового индекса."""
+    remove_from_search_index([instance.pk])
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+def increment_recipe_counter(sender, instance, created, **kwargs):
+    """Увеличение счетчика добавлений рецепта в избранное/покупки."""
+    if created:
+        field = COUNTERS[sender]
+        Recipe.objects.filter(pk=instance.recipe_id).update(
+            **{field: F(field) + 1}
+        )
+
+
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=ShoppingCart)
+def decrement_recipe_counter(sender, instance, **kwargs):
+    """Уменьшение счетчика добавлений рецепта в избранное/покупки."""
+    field = COUNTERS[sender]
+    Recipe.objects.filter(pk=instance.recipe_id).update(
+        **{field: F(field) - 1}
+    )
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def invalidate_feeds_on_publish(instance, created=True, **kwargs):
+    """Сброс кеша лент подписчиков при публикации/удалении рецепта."""
+    if created:
+        transaction.on_commit(
+            lambda: invalidate_follower_feeds(instance.author_id)
+        )
@@ -0,0 +1,481 @@
+import base64
+import io
+import re
+import shutil
+import tempfile
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+from rest_framework.test import APIClient
+
+from recipes.cache import local_cache
+from recipes.models import (Favorite, Ingredient, IngredientRecipe, Recipe,
+                            ShoppingCart, Tag)
+from recipes.search import get_fts_query, update_search_index
+from recipes.seeding import seed_references
+from users.models import Subscription, User
+
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+INGREDIENTS_WRITE = re.compile(
+    r'(INSERT|UPDATE|DELETE)(?: OR IGNORE)?(?: INTO| FROM)? '
+    r'"recipes_ingredientrecipe"'
+)
+
+
+def get_image():
+    """Изображение PNG в base64 для запросов к API."""
+    buffer = io.BytesIO()
+    Image.new('RGB', (2, 2), 'white').save(buffer, 'PNG')
+    return (
+        'data:image/png;base64,'
+        + base64.b64encode(buffer.getvalue()).decode()
+    )
+
+
+class RecipeTestCase(TestCase):
+    """Общие данные для тестов рецептов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create_user(
+                email=f'user{index}@example.com',
+                username=f'user{index}',
+                first_name='Имя',
+                last_name='Фамилия',
+                password='password-123'
+            )
+            for index in range(3)
+        ]
+        cls.tags = [
+            Tag.objects.create(
+                name=f'Тег {index}',
+                color=f'#00000{index}',
+                slug=f'tag{index}'
+            )
+            for index in range(3)
+        ]
+        cls.ingredients = [
+            Ingredient.objects.create(
+                name=f'ингредиент {index}',
+                measurement_unit='г'
+            )
+            for index in range(5)
+        ]
+        cls.recipes = []
+        for index in range(6):
+            recipe = Recipe.objects.create(
+                author=cls.users[index % 3],
+                name=f'Рецепт {index}',
+                image='recipes/test.png',
+                text='Описание',
+                cooking_time=10 + index
+            )
+            recipe.tags.set(cls.tags[:1 + index % 3])
+            IngredientRecipe.objects.bulk_create(
+                IngredientRecipe(
+                    recipe=recipe,
+                    ingredient=ingredient,
+                    amount=10
+                )
+                for ingredient in cls.ingredients[:3]
+            )
+            cls.recipes.append(recipe)
+        Subscription.objects.create(
+            user=cls.users[0],
+            following=cls.users[1]
+        )
+        Favorite.objects.create(user=cls.users[0], recipe=cls.recipes[1])
+        ShoppingCart.objects.create(
+            user=cls.users[0],
+            recipe=cls.recipes[2]
+        )
+
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.guest_client = APIClient()
+        self.client = APIClient()
+        self.client.force_authenticate(self.users[0])
+
+    @staticmethod
+    def get_recipe_data(recipe, **changes):
+        """Данные для изменения рецепта через API."""
+        data = {
+            'tags': [tag.pk for tag in recipe.tags.all()],
+            'ingredients': [
+                {'id': item.ingredient_id, 'amount': item.amount}
+                for item in recipe.recipe_ingredients.all()
+            ],
+            'name': recipe.name,
+            'image': get_image(),
+            'text': recipe.text,
+            'cooking_time': recipe.cooking_time,
+        }
+        data.update(changes)
+        return data
+
+
+class RecipeQueriesTests(RecipeTestCase):
+    """Количество SQL-запросов не зависит от числа рецептов."""
+
+    def test_list_queries(self):
+        for recipes_added in (0, 4):
+            Recipe.objects.bulk_create(
+                Recipe(
+                    author=self.users[2],
+                    name=f'Новый рецепт {index}',
+                    image='recipes/test.png',
+                    text='Описание',
+                    cooking_time=5
+                )
+                for index in range(recipes_added)
+            )
+            for client, queries in (
+                (self.guest_client, 4),
+                (self.client, 5),
+            ):
+                with self.subTest(
+                    authenticated=client is self.client,
+                    recipes_added=recipes_added
+                ):
+                    with self.assertNumQueries(queries):
+                        response = client.get('/api/recipes/?limit=50')
+                    self.assertEqual(response.status_code, 200)
+                    self.assertEqual(
+                        response.data['count'],
+                        Recipe.objects.count()
+                    )
+
+    def test_retrieve_queries(self):
+        for client, queries in (
+            (self.guest_client, 4),
+            (self.client, 5),
+        ):
+            with self.subTest(authenticated=client is self.client):
+                with self.assertNumQueries(queries):
+                    response = client.get(
+                        f'/api/recipes/{self.recipes[1].pk}/'
+                    )
+                self.assertEqual(response.status_code, 200)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class RecipeIngredientsUpdateTests(RecipeTestCase):
+    """Изменяются только отличающиеся ингредиенты рецепта."""
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def update(self, amounts):
+        """Изменение ингредиентов рецепта.
+
+        Возвращает запросы на изменение таблицы ингредиентов рецептов
+        по их типу.
+        """
+        recipe = self.recipes[0]
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.patch(
+                f'/api/recipes/{recipe.pk}/',
+                self.get_recipe_data(recipe, ingredients=[
+                    {'id': self.ingredients[index].pk, 'amount': amount}
+                    for index, amount in amounts.items()
+                ]),
+                format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            dict(
+                IngredientRecipe.objects.filter(recipe=recipe).values_list(
+                    'ingredient_id',
+                    'amount'
+                )
+            ),
+            {
+                self.ingredients[index].pk: amount
+                for index, amount in amounts.items()
+            }
+        )
+        writes = {}
+        for query in context.captured_queries:
+            match = INGREDIENTS_WRITE.match(query['sql'])
+            if match:
+                writes[match[1]] = writes.get(match[1], 0) + 1
+        return writes
+
+    def test_unchanged_ingredients(self):
+        self.assertEqual(self.update({0: 10, 1: 10, 2: 10}), {})
+
+    def test_added_ingredient(self):
+        self.assertEqual(
+            self.update({0: 10, 1: 10, 2: 10, 3: 5}),
+            {'INSERT': 1}
+        )
+
+    def test_removed_ingredient(self):
+        self.assertEqual(self.update({0: 10, 1: 10}), {'DELETE': 1})
+
+    def test_changed_amount(self):
+        self.assertEqual(
+            self.update({0: 10, 1: 20, 2: 30}),
+            {'UPDATE': 1}
+        )
+
+    def test_mixed_changes(self):
+        self.assertEqual(
+            self.update({1: 20, 2: 10, 4: 7}),
+            {'INSERT': 1, 'UPDATE': 1, 'DELETE': 1}
+        )
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class RecipeSearchTests(RecipeTestCase):
+    """Полнотекстовый поиск рецептов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        chicken = Ingredient.objects.create(
+            name='курица',
+            measurement_unit='г'
+        )
+        cls.by_name = Recipe.objects.create(
+            author=cls.users[0],
+            name='Курица с рисом',
+            image='recipes/test.png',
+            text='Рис отварить.',
+            cooking_time=40
+        )
+        cls.by_ingredient = Recipe.objects.create(
+            author=cls.users[0],
+            name='Плов',
+            image='recipes/test.png',
+            text='Обжарить и тушить.',
+            cooking_time=60
+        )
+        IngredientRecipe.objects.create(
+            recipe=cls.by_ingredient,
+            ingredient=chicken,
+            amount=500
+        )
+        cls.by_text = Recipe.objects.create(
+            author=cls.users[0],
+            name='Бульон',
+            image='recipes/test.png',
+            text='Сварить курицу.',
+            cooking_time=90
+        )
+        for recipe in (cls.by_name, cls.by_ingredient, cls.by_text):
+            recipe.tags.set(cls.tags[:1])
+        IngredientRecipe.objects.create(
+            recipe=cls.by_text,
+            ingredient=cls.ingredients[1],
+            amount=1
+        )
+        update_search_index(Recipe.objects.values_list('pk', flat=True))
+
+    def search(self, value):
+        response = self.guest_client.get(
+            '/api/recipes/',
+            {'search': value}
+        )
+        self.assertEqual(response.status_code, 200)
+        return [recipe['id'] for recipe in response.data['results']]
+
+    def test_fts_query(self):
+        self.assertEqual(
+            get_fts_query('Курицей с рисом!'),
+            '"куриц"* "с"* "рис"*'
+        )
+        self.assertEqual(get_fts_query('!!!'), '')
+
+    def test_ranking(self):
+        expected = [self.by_name.pk, self.by_ingredient.pk, self.by_text.pk]
+        for value in ('курица', 'курицей', 'кур'):
+            with self.subTest(value=value):
+                self.assertEqual(self.search(value), expected)
+
+    def test_no_matches(self):
+        self.assertEqual(self.search('шоколад'), [])
+        self.assertEqual(self.search('!!!'), [])
+
+    def test_reindex_only_changed(self):
+        client = APIClient()
+        client.force_authenticate(self.users[0])
+        url = f'/api/recipes/{self.by_text.pk}/'
+        for changes, reindexed in (
+            ({}, False),
+            ({'cooking_time': 30, 'tags': [self.tags[1].pk]}, False),
+            ({'name': 'Куриный бульон'}, True),
+            ({'ingredients': [
+                {'id': self.ingredients[0].pk, 'amount': 1}
+            ]}, True),
+        ):
+            with self.subTest(changes=changes):
+                with CaptureQueriesContext(connection) as context:
+                    response = client.patch(
+                        url,
+                        self.get_recipe_data(self.by_text, **changes),
+                        format='json'
+                    )
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    any(
+                        'recipes_recipe_fts' in query['sql']
+                        for query in context.captured_queries
+                    ),
+                    reindexed
+                )
+                self.by_text.refresh_from_db()
+        self.assertIn(self.by_text.pk, self.search('куриный'))
+
+    def test_reindex_on_ingredient_delete(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Ingredient.objects.get(name='курица').delete()
+        self.assertEqual(
+            self.search('курица'),
+            [self.by_name.pk, self.by_text.pk]
+        )
+
+
+class BulkRecipesTests(RecipeTestCase):
+    """Массовое добавление и удаление рецептов в избранное/покупки."""
+
+    COLLECTIONS = (
+        ('/api/recipes/favorite/', Favorite, 'favorites_count'),
+        ('/api/recipes/shopping_cart/', ShoppingCart, 'in_carts_count'),
+    )
+
+    def get_counters(self, field):
+        return dict(Recipe.objects.values_list('pk', field))
+
+    def test_add(self):
+        recipe_ids = [recipe.pk for recipe in self.recipes]
+        for url, model, field in self.COLLECTIONS:
+            with self.subTest(url=url):
+                existing = model.objects.get(user=self.users[0]).recipe_id
+                unknown = max(recipe_ids) + 1
+                requested = [existing, recipe_ids[3], unknown, recipe_ids[4],
+                             recipe_ids[3]]
+                with self.assertNumQueries(6):
+                    response = self.client.post(
+                        url,
+                        {'recipes': requested},
+                        format='json'
+                    )
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.data['results'], [
+                    {'id': existing, 'status': 'already_added'},
+                    {'id': recipe_ids[3], 'status': 'added'},
+                    {'id': unknown, 'status': 'not_found'},
+                    {'id': recipe_ids[4], 'status': 'added'},
+                ])
+                counters = self.get_counters(field)
+                for recipe_id in (existing, recipe_ids[3], recipe_ids[4]):
+                    self.assertEqual(counters[recipe_id], 1)
+                self.assertEqual(
+                    set(model.objects.filter(
+                        user=self.users[0]
+                    ).values_list('recipe_id', flat=True)),
+                    {existing, recipe_ids[3], recipe_ids[4]}
+                )
+
+    def test_remove(self):
+        for url, model, field in self.COLLECTIONS:
+            with self.subTest(url=url):
+                existing = model.objects.get(user=self.users[0]).recipe_id
+                missing = self.recipes[5].pk
+                with self.assertNumQueries(5):
+                    response = self.client.delete(
+                        url,
+                        {'recipes': [existing, missing]},
+                        format='json'
+                    )
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.data['results'], [
+                    {'id': existing, 'status': 'removed'},
+                    {'id': missing, 'status': 'not_found'},
+                ])
+                self.assertEqual(self.get_counters(field)[existing], 0)
+                self.assertFalse(
+                    model.objects.filter(user=self.users[0]).exists()
+                )
+
+    def test_clear_queries_do_not_depend_on_size(self):
+        recipe_ids = [recipe.pk for recipe in self.recipes]
+        for url, model, field in self.COLLECTIONS:
+            model.objects.filter(user=self.users[0]).delete()
+            for size in (1, len(recipe_ids)):
+                with self.subTest(url=url, size=size):
+                    self.client.post(
+                        url,
+                        {'recipes': recipe_ids[:size]},
+                        format='json'
+                    )
+                    model.objects.create(
+                        user=self.users[1],
+                        recipe=self.recipes[0]
+                    )
+                    with self.assertNumQueries(5):
+                        response = self.client.delete(url)
+                    self.assertEqual(response.status_code, 200)
+                    self.assertEqual(
+                        [item['status'] for item in response.data['results']],
+                        ['removed'] * size
+                    )
+                    self.assertFalse(
+                        model.objects.filter(user=self.users[0]).exists()
+                    )
+                    counters = self.get_counters(field)
+                    self.assertEqual(counters[self.recipes[0].pk], 1)
+                    self.assertEqual(sum(counters.values()), 1)
+                    model.objects.filter(user=self.users[1]).delete()
+
+    def test_invalid_requests(self):
+        url = self.COLLECTIONS[0][0]
+        self.assertEqual(
+            self.client.post(url, {'recipes': []}, format='json').status_code,
+            400
+        )
+        self.assertEqual(
+            self.client.post(
+                url,
+                {'recipes': ['x']},
+                format='json'
+            ).status_code,
+            400
+        )
+        self.assertEqual(
+            self.guest_client.post(
+                url,
+                {'recipes': [self.recipes[0].pk]},
+                format='json'
+            ).status_code,
+            401
+        )
+
+
+class SeedReferencesTests(TestCase):
+    """Наполнение справочников для синтетических данных."""
+
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+
+    def test_cached_references_invalidated(self):
+        client = APIClient()
+        self.assertEqual(client.get('/api/ingredients/').json(), [])
+        self.assertEqual(client.get('/api/tags/').json(), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            seed_references()
+        self.assertEqual(
+            len(client.get('/api/ingredients/').json()),
+            Ingredient.objects.count()
+        )
+        self.assertEqual(len(client.get('/api/tags/').json()), 3)
@@ -0,0 +1,72 @@
+import math
+
+from django.db.models import F
+from django.utils import timezone
+
+from foodgram_backend import constants
+from .models import Recipe
+
+DECAY_RATE = math.log(2) / constants.TRENDING_HALF_LIFE_HOURS
+
+
+def get_time_weight(moment):
+    """Логарифм веса добавления в избранное, сделанного в момент moment.
+
+    Вес растет экспоненциально от TRENDING_EPOCH, поэтому все ранее
+    учтенные добавления "стареют" одинаково, и рейтинг рецепта
+    пересчитывается, только когда меняется число его добавлений.
+    """
+    hours = (moment - constants.TRENDING_EPOCH).total_seconds() / 3600
+    return DECAY_RATE * hours
+
+
+def get_trending_score(score, delta, moment):
+    """Новый рейтинг рецепта после изменения числа добавлений на delta.
+
+    Рейтинг - логарифм суммы весов добавлений, 0 - добавлений нет.
+    Удаленные из избранного записи вычитаются с текущим весом.
+    """
+    weight = get_time_weight(moment)
+    decayed = math.exp(score - weight) if score else 0
+    decayed += delta
+    if decayed <= 0:
+        return 0
+    return math.log(decayed) + weight
+
+
+def update_trending(full=False):
+    """Пересчет рейтинга рецептов, число добавлений которых изменилось.
+
+    Рецепты обрабатываются пачками по возрастанию id. Возвращает
+    количество обновленных рецептов.
+    """
+    if full:
+        Recipe.objects.update(trending_score=0, trending_count=0)
+    now = timezone.now()
+    stale = Recipe.objects.exclude(
+        favorites_count=F('trending_count')
+    ).order_by('pk').only(
+        'trending_score',
+        'trending_count',
+        'favorites_count'
+    )
+    updated = last_pk = 0
+    while True:
+        batch = list(
+            stale.filter(pk__gt=last_pk)[:constants.TRENDING_BATCH_SIZE]
+        )
+        if not batch:
+            return updated
+        for recipe in batch:
+            recipe.trending_score = get_trending_score(
+                recipe.trending_score,
+                recipe.favorites_count - recipe.trending_count,
+                now
+            )
+            recipe.trending_count = recipe.favorites_count
+        Recipe.objects.bulk_update(
+            batch,
+            ('trending_score', 'trending_count')
+        )
+        updated += len(batch)
+        last_pk = batch[-1].pk
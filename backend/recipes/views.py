@@ -1,22 +1,32 @@
-from django.db.models import Sum
-from django.http import HttpResponse
+from django.db.models import Exists, OuterRef, Sum
 from django.shortcuts import get_object_or_404
+from django.utils.cache import patch_vary_headers
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from foodgram_backend import constants
+from users.models import Subscription
 from users.serializers import RecipeShortSerializer
-from .filters import IngredientFilter, RecipeFilter
+from .autocomplete import search_ingredients
+from .bulk import add_recipes, remove_recipes
+from .cache import get_version
+from .exporters import EXPORTERS
+from .feed import get_feed_head
+from .filters import RECIPE_ORDERINGS, RecipeFilter, get_recipe_ordering
+from .mixins import CachedReferenceMixin, conditional_response
 from .models import (Favorite, Ingredient, IngredientRecipe, Recipe,
                      ShoppingCart, Tag)
-from .pagination import CustomPagination
+from .pagination import CustomPagination, KeysetPagination
 from .permissions import (AdminOrReadOnly, AuthorAdminOrReadOnly,
                           IsAuthorPermission)
 from .serializers import (FavoriteSerializer, IngredientSerializer,
-                          RecipeListSerializer, RecipeSerializer,
-                          ShoppingCartSerializer, TagSerializer)
+                          RecipeIdsSerializer, RecipeListSerializer,
+                          RecipeSerializer, ShoppingCartSerializer,
+                          TagSerializer)
 
 
 class RecipeViewSet(viewsets.ModelViewSet):
@@ -33,9 +43,85 @@ class RecipeViewSet(viewsets.ModelViewSet):
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
 
+    @property
+    def cursor_ordering(self):
+        """Порядок рецептов для пагинации по ключу."""
+        if self.action == 'feed':
+            return RECIPE_ORDERINGS['newest']
+        return get_recipe_ordering(self.request)
+
+    def get_queryset(self):
+        """Оптимизированный набор запросов для просмотра рецептов."""
+        queryset = super().get_queryset()
+        if self.action in ('list', 'retrieve', 'feed'):
+            return queryset.with_related().with_user_flags(
+                self.request.user
+            )
+        return queryset
+
+    def get_etag_state(self):
+        """Данные рецепта, от которых зависит ответ для пользователя.
+
+        Возвращает строку для ETag или None, если рецепт не найден.
+        Last-Modified не передается: автор, миниатюры и счетчики
+        меняются без изменения modified_date рецепта.
+        """
+        user = self.request.user
+        fields = [
+            'modified_date',
+            'thumbnails',
+            'favorites_count',
+            'author__email',
+            'author__username',
+            'author__first_name',
+            'author__last_name',
+        ]
+        try:
+            queryset = Recipe.objects.filter(
+                pk=self.kwargs[self.lookup_field]
+            ).with_user_flags(user)
+        except ValueError:
+            return None
+        if user.is_authenticated:
+            queryset = queryset.annotate(
+                is_subscribed=Exists(
+                    Subscription.objects.filter(
+                        user=user,
+                        following=OuterRef('author')
+                    )
+                )
+            )
+            fields += ['is_favorited', 'is_in_shopping_cart', 'is_subscribed']
+        state = queryset.values_list(*fields).first()
+        if state is None:
+            return None
+        versions = (get_version('tags'), get_version('ingredients'))
+        return f'recipe:{user.pk}:{state}:{versions}'
+
+    def retrieve(self, request, *args, **kwargs):
+        """Получение рецепта.
+
+        Поддерживаются условные запросы по ETag.
+        """
+        etag = self.get_etag_state()
+        if etag is None:
+            return super().retrieve(request, *args, **kwargs)
+        response = conditional_response(
+            request,
+            etag,
+            None,
+            lambda: super(RecipeViewSet, self).retrieve(
+                request,
+                *args,
+                **kwargs
+            )
+        )
+        patch_vary_headers(response, ('Authorization',))
+        return response
+
     def get_serializer_class(self):
         """Выбор сериализатора."""
-        if self.action in ('list', 'retrieve'):
+        if self.action in ('list', 'retrieve', 'feed'):
             return RecipeListSerializer
         return RecipeSerializer
 
@@ -54,6 +140,50 @@ class RecipeViewSet(viewsets.ModelViewSet):
         )
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    @staticmethod
+    def bulk_add(model, request):
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response({'results': add_recipes(
+            model,
+            request.user,
+            serializer.validated_data['recipes']
+        )})
+
+    @staticmethod
+    def bulk_remove(model, request):
+        serializer = RecipeIdsSerializer(data=request.data, partial=True)
+        serializer.is_valid(raise_exception=True)
+        return Response({'results': remove_recipes(
+            model,
+            request.user,
+            serializer.validated_data.get('recipes')
+        )})
+
+    @action(
+        detail=False,
+        methods=('get',),
+        permission_classes=(IsAuthenticated,),
+        pagination_class=KeysetPagination
+    )
+    def feed(self, request):
+        """Лента рецептов авторов, на которых подписан пользователь.
+
+        Рецепты всех авторов выводятся от новых к старым. Первая страница
+        выбирается по id из кеша, следующие - по ключу (pub_date, id)
+        с проверкой подписки на автора через EXISTS, поэтому число
+        и стоимость запросов не зависят от количества подписок.
+        """
+        if request.query_params.get(self.paginator.cursor_query_param):
+            queryset = self.get_queryset().followed_by(request.user)
+        else:
+            queryset = self.get_queryset().filter(
+                pk__in=get_feed_head(request.user)
+            )
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
     @action(
         detail=True,
         methods=('post',),
@@ -76,7 +206,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
             recipe=recipe
         ).delete()
         if not delete_cnt:
-            return ValidationError(
+            raise ValidationError(
                 'Этого рецепта нет в избранном!'
             )
         return Response(status=status.HTTP_204_NO_CONTENT)
@@ -103,26 +233,58 @@ class RecipeViewSet(viewsets.ModelViewSet):
             recipe=recipe
         ).delete()
         if not delete_cnt:
-            return ValidationError(
-                'Этого рецепта нет в списке покупо!'
+            raise ValidationError(
+                'Этого рецепта нет в списке покупок!'
             )
         return Response(status=status.HTTP_204_NO_CONTENT)
 
-    @staticmethod
-    def save_file(list_for_print):
-        """Сохранение списка покупок в файл."""
-        list_name = 'Список покупок:\n\n'
-        for ingredient in list_for_print:
-            list_name += (
-                f'{ingredient["ingredient__name"]} - '
-                f'{ingredient["amount"]} '
-                f'{ingredient["ingredient__measurement_unit"]}\n'
-            )
-        response = HttpResponse(list_name, content_type='text/plain')
-        response['Content-Disposition'] = (
-            'attachment; filename=shopping_list.txt'
-        )
-        return response
+    @action(
+        detail=False,
+        methods=('post',),
+        permission_classes=(IsAuthenticated,),
+        url_path='favorite',
+        url_name='bulk-favorite'
+    )
+    def bulk_favorite(self, request):
+        """Добавление рецептов из списка recipes в избранное.
+
+        Выполняется одним запросом INSERT, для каждого рецепта
+        возвращается результат: added, already_added или not_found.
+        """
+        return self.bulk_add(Favorite, request)
+
+    @bulk_favorite.mapping.delete
+    def bulk_delete_favorite(self, request):
+        """Удаление рецептов из списка recipes из избранного.
+
+        Без списка избранное очищается полностью. Для каждого рецепта
+        возвращается результат: removed или not_found.
+        """
+        return self.bulk_remove(Favorite, request)
+
+    @action(
+        detail=False,
+        methods=('post',),
+        permission_classes=(IsAuthenticated,),
+        url_path='shopping_cart',
+        url_name='bulk-shopping-cart'
+    )
+    def bulk_shopping_cart(self, request):
+        """Добавление рецептов из списка recipes в список покупок.
+
+        Выполняется одним запросом INSERT, для каждого рецепта
+        возвращается результат: added, already_added или not_found.
+        """
+        return self.bulk_add(ShoppingCart, request)
+
+    @bulk_shopping_cart.mapping.delete
+    def bulk_delete_shopping_cart(self, request):
+        """Удаление рецептов из списка recipes из списка покупок.
+
+        Без списка список покупок очищается полностью. Для каждого
+        рецепта возвращается результат: removed или not_found.
+        """
+        return self.bulk_remove(ShoppingCart, request)
 
     @action(
         detail=False,
@@ -130,34 +292,65 @@ class RecipeViewSet(viewsets.ModelViewSet):
         permission_classes=(IsAuthorPermission, )
     )
     def download_shopping_cart(self, request):
-        """Скачать список покупок."""
-        shopping_cart = ShoppingCart.objects.filter(user=self.request.user)
-        recipes = [item.recipe.id for item in shopping_cart]
+        """Скачать список покупок.
+
+        Формат файла задается параметром file_format: txt, csv или json.
+        """
+        file_format = request.query_params.get(
+            'file_format',
+            constants.DEFAULT_SHOPPING_LIST_FORMAT
+        )
+        if file_format not in EXPORTERS:
+            raise ValidationError(
+                {'file_format': f'Доступные форматы: {", ".join(EXPORTERS)}'}
+            )
         shopping_list = IngredientRecipe.objects.filter(
-            recipe__in=recipes
+            recipe__shopping_cart__user=request.user
         ).values(
             'ingredient__name',
             'ingredient__measurement_unit'
         ).order_by(
             'ingredient__name'
         ).annotate(amount=Sum('amount'))
-        return self.save_file(shopping_list)
+        return EXPORTERS[file_format]().get_response(
+            shopping_list.iterator(
+                chunk_size=constants.SHOPPING_LIST_CHUNK_SIZE
+            )
+        )
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(CachedReferenceMixin, viewsets.ReadOnlyModelViewSet):
     """Представление для модели Ingredient."""
 
+    cache_namespace = 'ingredients'
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     permission_classes = (AdminOrReadOnly, )
-    filter_backends = (DjangoFilterBackend,)
-    filterset_class = IngredientFilter
     pagination_class = None
 
+    def list(self, request, *args, **kwargs):
+        """Список ингредиентов с поиском по названию.
+
+        Поиск без учета регистра, совпадения по началу названия
+        выводятся раньше совпадений по вхождению.
+        """
+        if not request.query_params.get('name'):
+            return super().list(request, *args, **kwargs)
+        return self.cached_response(self.search, request)
+
+    def search(self, request):
+        """Поиск ингредиентов по названию."""
+        serializer = self.get_serializer(
+            search_ingredients(request.query_params['name']),
+            many=True
+        )
+        return Response(serializer.data)
+
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+class TagViewSet(CachedReferenceMixin, viewsets.ReadOnlyModelViewSet):
     """Представление для модели Tag."""
 
+    cache_namespace = 'tags'
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = (AdminOrReadOnly, )
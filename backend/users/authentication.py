@@ -0,0 +1,77 @@
+from hashlib import sha256
+
+from django.core.cache import cache
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from foodgram_backend import constants
+from .models import User
+
+# Поля пользователя, хранимые в кеше. Пароль и счетчики в кеш
+# не попадают и загружаются по id при обращении к ним.
+CACHED_USER_FIELDS = (
+    'id',
+    'email',
+    'username',
+    'first_name',
+    'last_name',
+    'is_active',
+    'is_staff',
+    'is_superuser',
+)
+
+
+def token_cache_key(key):
+    """Ключ кеша токена, сам токен в кеш не передается."""
+    return f'auth:token:{sha256(key.encode()).hexdigest()}'
+
+
+def invalidate_token(key):
+    cache.delete(token_cache_key(key))
+
+
+def restore_user(values):
+    """Пользователь из полей, сохраненных в кеше.
+
+    Остальные поля отложены: они загружаются из БД по id при обращении,
+    а save() сохраняет только загруженные поля.
+    """
+    field_names = [
+        field.attname for field in User._meta.concrete_fields
+        if field.attname in values
+    ]
+    return User.from_db(
+        User.objects.db,
+        field_names,
+        [values[name] for name in field_names]
+    )
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Аутентификация по токену с кешированием пользователя.
+
+    Поля пользователя из CACHED_USER_FIELDS хранятся в кеше
+    AUTH_TOKEN_CACHE_TIMEOUT секунд. Запись удаляется при удалении
+    токена и при сохранении пользователя (смена пароля, деактивация).
+    Изменения через QuerySet.update() сигналов не вызывают и
+    вступают в силу по истечении этого времени.
+    """
+
+    def authenticate_credentials(self, key):
+        cache_key = token_cache_key(key)
+        values = cache.get(cache_key)
+        if values is None:
+            user, token = super().authenticate_credentials(key)
+            cache.set(
+                cache_key,
+                {name: getattr(user, name) for name in CACHED_USER_FIELDS},
+                constants.AUTH_TOKEN_CACHE_TIMEOUT
+            )
+            return user, token
+        if not values['is_active']:
+            invalidate_token(key)
+            return super().authenticate_credentials(key)
+        user = restore_user(values)
+        token = Token.from_db(Token.objects.db, ('key',), (key,))
+        token.user = user
+        return user, token
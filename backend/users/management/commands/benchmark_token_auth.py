@@ -0,0 +1,59 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIRequestFactory
+
+from users.authentication import CachedTokenAuthentication, invalidate_token
+
+
+def measure(authentication, request, repeat):
+    """Число SQL-запросов и время аутентификации в миллисекундах."""
+    timings = []
+    with CaptureQueriesContext(connection) as context:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            authentication.authenticate(request)
+            timings.append((time.perf_counter() - start) * 1000)
+    return len(context.captured_queries), timings
+
+
+class Command(BaseCommand):
+    help = 'Сравнение аутентификации по токену с кешированием и без'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=1000,
+            help='Количество аутентифицированных запросов.'
+        )
+
+    def handle(self, *args, **options):
+        token = Token.objects.first()
+        if token is None:
+            raise CommandError('Нет токенов, выполните вход пользователя')
+        request = APIRequestFactory().get(
+            '/api/users/me/',
+            HTTP_AUTHORIZATION=f'Token {token.key}'
+        )
+        invalidate_token(token.key)
+        for authentication in (
+            TokenAuthentication(),
+            CachedTokenAuthentication()
+        ):
+            queries, timings = measure(
+                authentication,
+                request,
+                options['repeat']
+            )
+            self.stdout.write(
+                f'{type(authentication).__name__}: '
+                f'запросов к БД {queries / options["repeat"]:.3f} '
+                f'на запрос, медиана {statistics.median(timings):.3f} мс, '
+                f'p95 {statistics.quantiles(timings, n=20)[-1]:.3f} мс'
+            )
@@ -0,0 +1,33 @@
+# Generated by Django 3.2.3 on 2026-10-18 17:32
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+from foodgram_backend.migration_operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('users', '0006_auto_20230905_2111'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='subscription',
+            index=models.Index(fields=['following', 'user'], name='subscription_following_idx'),
+        ),
+        migrations.AlterField(
+            model_name='subscription',
+            name='following',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='following', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь на которого подписались'),
+        ),
+        migrations.AlterField(
+            model_name='subscription',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='follower', to=settings.AUTH_USER_MODEL, verbose_name='Подписчик'),
+        ),
+    ]
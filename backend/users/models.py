@@ -37,6 +37,16 @@ class User(AbstractUser):
         max_length=constants.MAX_LENGTH_FIELD_USER_MODELS,
         verbose_name='Пароль'
     )
+    recipes_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество рецептов'
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество подписчиков'
+    )
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username', 'first_name', 'last_name']
@@ -56,12 +66,14 @@ class Subscription(models.Model):
     user = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
+        db_index=False,
         related_name='follower',
         verbose_name='Подписчик'
     )
     following = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
+        db_index=False,
         related_name='following',
         verbose_name='Пользователь на которого подписались'
     )
@@ -80,3 +92,9 @@ class Subscription(models.Model):
                 name='unique_subscription'
             ),
         ]
+        indexes = [
+            models.Index(
+                fields=['following', 'user'],
+                name='subscription_following_idx'
+            ),
+        ]
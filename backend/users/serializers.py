@@ -2,6 +2,7 @@ from djoser.serializers import UserSerializer
 from rest_framework import serializers
 from rest_framework.validators import UniqueTogetherValidator
 
+from recipes.fields import ThumbnailField
 from recipes.models import Recipe
 from .models import Subscription, User
 
@@ -22,19 +23,37 @@ class CustomUserSerializer(UserSerializer):
             'is_subscribed'
         ]
 
+    @staticmethod
+    def get_following_ids(request):
+        """Получение id авторов, на которых подписан текущий пользователь.
+
+        Загружается одним запросом и сохраняется в объекте запроса,
+        поэтому общий для всех сериализаторов в рамках одного запроса.
+        """
+        if not hasattr(request, 'following_ids'):
+            request.following_ids = set(
+                request.user.follower.order_by().values_list(
+                    'following_id',
+                    flat=True
+                )
+            )
+        return request.following_ids
+
     def get_is_subscribed(self, obj):
         """Отметка подписан ли текущий пользователь на автора."""
-        request = self.context['request']
+        request = self.context.get('request')
         return bool(
             request
             and request.user.is_authenticated
-            and request.user.follower.filter(following=obj).exists()
+            and obj.pk in self.get_following_ids(request)
         )
 
 
 class RecipeShortSerializer(serializers.ModelSerializer):
     """Сериализатор для отображения информации о рецепте в подписке."""
 
+    image = ThumbnailField('short')
+
     class Meta:
         model = Recipe
         fields = (
@@ -45,6 +64,35 @@ class RecipeShortSerializer(serializers.ModelSerializer):
         )
 
 
+def get_recipes_limit(request):
+    """Получение ограничения количества рецептов автора из запроса."""
+    try:
+        limit = int(request.GET.get('recipes_limit'))
+    except (TypeError, ValueError):
+        return None
+    return limit if limit >= 0 else None
+
+
+class SubscriptionListSerializer(serializers.ListSerializer):
+    """Сериализатор списка подписок.
+
+    Рецепты всех авторов страницы загружаются одним запросом.
+    """
+
+    def to_representation(self, data):
+        authors = list(data)
+        limit = get_recipes_limit(self.context['request'])
+        recipes = Recipe.objects.filter(author__in=authors)
+        if authors and limit is not None:
+            recipes = recipes.latest_per_author(limit)
+        author_recipes = {author.pk: [] for author in authors}
+        for recipe in recipes:
+            author_recipes[recipe.author_id].append(recipe)
+        for author in authors:
+            author.page_recipes = author_recipes[author.pk]
+        return super().to_representation(authors)
+
+
 class SubscriptionSerializer(CustomUserSerializer):
     """Сериализатор для отображения модели Подписки."""
 
@@ -57,28 +105,33 @@ class SubscriptionSerializer(CustomUserSerializer):
             'recipes',
             'recipes_count'
         ]
+        list_serializer_class = SubscriptionListSerializer
 
     def get_recipes(self, obj):
         """
         Получение рецептов автора,
         на которого подписан текущий пользователь.
         """
-        request = self.context['request']
-        limit = request.GET.get('recipes_limit')
-        recipes = obj.recipes.all()
-        if limit:
-            try:
-                recipes = recipes[:int(limit)]
-            except ValueError:
-                pass
-        return RecipeShortSerializer(recipes, many=True, read_only=True).data
+        if hasattr(obj, 'page_recipes'):
+            recipes = obj.page_recipes
+        else:
+            recipes = obj.recipes.all()
+            limit = get_recipes_limit(self.context['request'])
+            if limit is not None:
+                recipes = recipes[:limit]
+        return RecipeShortSerializer(
+            recipes,
+            many=True,
+            read_only=True,
+            context=self.context
+        ).data
 
     def get_recipes_count(self, obj):
         """
         Получение количества рецептов автора,
         на которого подписан текущий пользователь.
         """
-        return obj.recipes.count()
+        return obj.recipes_count
 
 
 class SubscriptionCreateSerializer(serializers.ModelSerializer):
@@ -0,0 +1,53 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from recipes.feed import invalidate_feeds
+from .authentication import invalidate_token
+from .models import Subscription, User
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(instance, **kwargs):
+    """Сброс кеша токена при выходе пользователя."""
+    transaction.on_commit(lambda: invalidate_token(instance.key))
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_tokens(instance, created, update_fields=None, **kwargs):
+    """Сброс кеша токенов пользователя при изменении его данных.
+
+    Обновление времени последнего входа кеш не сбрасывает.
+    """
+    if created or update_fields == frozenset(('last_login',)):
+        return
+    for key in Token.objects.filter(user=instance).values_list(
+        'key',
+        flat=True
+    ):
+        transaction.on_commit(lambda key=key: invalidate_token(key))
+
+
+@receiver(post_save, sender=Subscription)
+def increment_followers_count(instance, created, **kwargs):
+    """Увеличение счетчика подписчиков автора."""
+    if created:
+        User.objects.filter(pk=instance.following_id).update(
+            followers_count=F('followers_count') + 1
+        )
+
+
+@receiver(post_delete, sender=Subscription)
+def decrement_followers_count(instance, **kwargs):
+    """Уменьшение счетчика подписчиков автора."""
+    User.objects.filter(pk=instance.following_id).update(
+        followers_count=F('followers_count') - 1
+    )
+
+
+@receiver((post_save, post_delete), sender=Subscription)
+def invalidate_subscriber_feed(instance, **kwargs):
+    """Сброс кеша ленты пользователя при изменении подписок."""
+    transaction.on_commit(lambda: invalidate_feeds([instance.user_id]))
@@ -19,6 +19,7 @@ class CustomUserViewSet(UserViewSet):
     queryset = User.objects.all()
     serializer_class = CustomUserSerializer
     pagination_class = CustomPagination
+    cursor_ordering = ('username', 'id')
 
     @action(
         detail=False,
@@ -65,7 +66,7 @@ class CustomUserViewSet(UserViewSet):
             following=following
         ).delete()
         if not delete_cnt:
-            return ValidationError(
+            raise ValidationError(
                 'Вы не подписаны на этого пользователя!'
             )
         return Response(status=status.HTTP_204_NO_CONTENT)